@@ -0,0 +1,244 @@
+from scheduling_problem import fitness_components
+from crossover import crossover_methods
+from reporters import GenerationRecord, get_reporter
+import random
+import numpy as np
+
+
+def random_genomes(instance, size, rng):
+    """Draws the initial genomes, following the same scheme as get_representation.
+
+    Each worker gets the ideal number of shifts at random, and the shifts left are placed at random among the
+    positions still free.
+
+    Args:
+        instance (ProblemInstance): The problem being solved.
+        size (int): Number of genomes.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        np.ndarray: Genomes shaped (size, genome_length), as uint8.
+    """
+    total_workers_shifts = sum(instance.workers_per_shift)
+    perfect_shifts_per_worker = int(total_workers_shifts / instance.workers)
+
+    # Choosing the shifts of each worker by ranking random keys inside each calendar.
+    keys = rng.random((size, instance.workers, instance.total_shifts))
+    chosen = np.argsort(keys, axis=2)[:, :, :perfect_shifts_per_worker]
+    calendar = np.zeros((size, instance.workers, instance.total_shifts), dtype=np.uint8)
+    np.put_along_axis(calendar, chosen, 1, axis=2)
+    genomes = calendar.reshape(size, -1)
+
+    # We attribute randomly the shifts that are left, among the free positions.
+    left = total_workers_shifts - perfect_shifts_per_worker * instance.workers
+    if left > 0:
+        keys = rng.random(genomes.shape)
+        keys[genomes == 1] = np.inf
+        np.put_along_axis(genomes, np.argsort(keys, axis=1)[:, :left], 1, axis=1)
+    return genomes
+
+
+def lexicographic_ranks(fitness):
+    """Ranks the fitness tuples the way Python compares them, the lowest one gets rank 0.
+
+    Args:
+        fitness (np.ndarray): Fitness components shaped (n, 9).
+
+    Returns:
+        np.ndarray: Rank of each row.
+    """
+    # lexsort uses the last key as the primary one.
+    order = np.lexsort(fitness.T[::-1])
+    ranks = np.empty(len(fitness), dtype=np.int64)
+    ranks[order] = np.arange(len(fitness))
+    return ranks
+
+
+def fps_indexes(fitness, optim, n, rng):
+    """Vectorized fitness proportionate selection, with the same probabilities as fps."""
+    values = fitness[:, 0].astype(np.float64)
+    lowest_fitness = min(100, values.min())
+    absolute_fitness = -lowest_fitness if lowest_fitness < 0 else 0
+
+    if optim == "max":
+        weights = values + absolute_fitness
+    elif optim == "min":
+        max_joint_fitness = (values + absolute_fitness).max()
+        weights = (max_joint_fitness - (values + absolute_fitness)) / (max_joint_fitness + 0.0001)
+    else:
+        raise Exception("No optimization specified (min or max).")
+
+    # When every individual has the same weight (all of them with the lowest fitness), fps can't spin the
+    # wheel, so we draw them uniformly.
+    if weights.sum() <= 0:
+        return rng.integers(len(values), size=n)
+    return rng.choice(len(values), size=n, p=weights / weights.sum())
+
+
+def rank_indexes(fitness, optim, n, rng):
+    """Vectorized rank selection, with the same probabilities as rank."""
+    ranks = lexicographic_ranks(fitness) + 1
+    if optim == "min":
+        ranks = len(ranks) + 1 - ranks
+    return rng.choice(len(ranks), size=n, p=ranks / ranks.sum())
+
+
+def tournament_indexes(fitness, optim, n, rng, size=4):
+    """Vectorized tournament selection, with repetition inside each tournament like tournament_sel."""
+    ranks = lexicographic_ranks(fitness)
+    tournaments = rng.integers(len(fitness), size=(n, size))
+    if optim == "max":
+        winners = np.argmax(ranks[tournaments], axis=1)
+    else:
+        winners = np.argmin(ranks[tournaments], axis=1)
+    return tournaments[np.arange(n), winners]
+
+
+def uniform_pairs(parents1, parents2, rng):
+    """Vectorized uniform_crossover of every pair."""
+    mask = rng.random(parents1.shape) < 0.5
+    return np.where(mask, parents1, parents2), np.where(mask, parents2, parents1)
+
+
+def single_point_pairs(parents1, parents2, rng):
+    """Vectorized single_point_co of every pair, the point is drawn between 1 and len - 2 like randint."""
+    points = rng.integers(1, parents1.shape[1] - 1, size=len(parents1))
+    mask = np.arange(parents1.shape[1]) < points[:, None]
+    return np.where(mask, parents1, parents2), np.where(mask, parents2, parents1)
+
+
+def binary_rows(genomes, rng):
+    """Vectorized binary_mutation, flips one random bit of each row."""
+    rows = np.arange(len(genomes))
+    positions = rng.integers(genomes.shape[1], size=len(genomes))
+    genomes[rows, positions] = 1 - genomes[rows, positions]
+    return genomes
+
+
+def swap_rows(genomes, rng):
+    """Vectorized swap_mutation, swaps two distinct random positions of each row."""
+    rows = np.arange(len(genomes))
+    first, second = distinct_positions(genomes, rng)
+    genomes[rows, first], genomes[rows, second] = genomes[rows, second], genomes[rows, first]
+    return genomes
+
+
+def inversion_rows(genomes, rng):
+    """Vectorized inversion_mutation, reverts the portion between two distinct random positions of each row."""
+    start, end = np.sort(np.stack(distinct_positions(genomes, rng)), axis=0)
+    index = np.arange(genomes.shape[1])
+    inside = (index >= start[:, None]) & (index < end[:, None])
+    source = np.where(inside, (start + end - 1)[:, None] - index, index)
+    return np.take_along_axis(genomes, source, axis=1)
+
+
+def distinct_positions(genomes, rng):
+    """Draws two distinct positions for each row, like sample(range(len), 2)."""
+    first = rng.integers(genomes.shape[1], size=len(genomes))
+    second = rng.integers(genomes.shape[1] - 1, size=len(genomes))
+    second += second >= first
+    return first, second
+
+
+# The vectorized operators, keyed by the name of the operator they replace.
+selection_engines = {"fps": fps_indexes, "rank": rank_indexes, "tournament_sel": tournament_indexes}
+crossover_engines = {"uniform_crossover": uniform_pairs, "single_point_co": single_point_pairs}
+mutation_engines = {"binary_mutation": binary_rows, "swap_mutation": swap_rows, "inversion_mutation": inversion_rows}
+
+
+def operator_name(operator):
+    return operator if isinstance(operator, str) else operator.__name__
+
+
+class ArrayPopulation:
+    """Population stored as a single (size, genome_length) array and evolved with vectorized operators.
+
+    It runs the same generational scheme as Population.evolve. The operators are given by name or as the
+    functions of selection.py, crossover.py and mutation.py; the crossovers without a vectorized version
+    (cycle_xo_binary_input and pmx_binary_input) are applied pair by pair.
+    """
+
+    def __init__(self, size, optim, instance, seed=None):
+        self.size = size
+        self.optim = optim
+        self.instance = instance
+        self.gen = 1
+        self.fitnesses = []
+        self.rng = np.random.default_rng(seed)
+        self.genomes = random_genomes(instance, size, self.rng)
+        self.fitness = fitness_components(self.genomes, instance)
+
+    def best_index(self):
+        ranks = lexicographic_ranks(self.fitness)
+        return int(np.argmax(ranks)) if self.optim == "max" else int(np.argmin(ranks))
+
+    def crossover_pairs(self, crossover, parents1, parents2):
+        name = operator_name(crossover)
+        if name in crossover_engines:
+            return crossover_engines[name](parents1, parents2, self.rng)
+
+        # Falling back to the operator itself, one pair at a time, with a random generator seeded from the one of
+        # the population so the runs stay reproducible.
+        crossover = crossover_methods[name]
+        rng = random.Random(int(self.rng.integers(2 ** 63)))
+        offspring = [crossover(list(p1), list(p2), rng=rng) for p1, p2 in zip(parents1, parents2)]
+        return (np.array([o1 for o1, _ in offspring], dtype=np.uint8),
+                np.array([o2 for _, o2 in offspring], dtype=np.uint8))
+
+    def evolve(self, gens, xo_prob, mut_prob, select, mutate, crossover, elitism, report="silent"):
+        reporter = get_reporter(report)
+        if operator_name(mutate) not in mutation_engines:
+            raise Exception(f"The array engine has no vectorized version of {operator_name(mutate)}.")
+        select_rows = selection_engines[operator_name(select)]
+        mutate_rows = mutation_engines[operator_name(mutate)]
+        pairs = -(-self.size // 2)
+
+        for i in range(gens):
+            if elitism:
+                elite = self.best_index()
+                elite_genome, elite_fitness = self.genomes[elite].copy(), self.fitness[elite].copy()
+
+            # Selecting every parent of the generation at once.
+            parents = select_rows(self.fitness, self.optim, 2 * pairs, self.rng)
+            parents1, parents2 = self.genomes[parents[:pairs]], self.genomes[parents[pairs:]]
+
+            # Crossing over the pairs that pass the crossover probability, the others are copied.
+            crossing = self.rng.random(pairs) < xo_prob
+            offspring1, offspring2 = parents1.copy(), parents2.copy()
+            if crossing.any():
+                offspring1[crossing], offspring2[crossing] = self.crossover_pairs(crossover, parents1[crossing],
+                                                                                 parents2[crossing])
+            offspring = np.concatenate([offspring1, offspring2])
+            # Keeping the same order as evolve, first and second offspring of each pair side by side.
+            offspring = offspring.reshape(2, pairs, -1).transpose(1, 0, 2).reshape(2 * pairs, -1)[:self.size]
+
+            # Mutating each offspring with the mutation probability.
+            mutating = self.rng.random(self.size) < mut_prob
+            if mutating.any():
+                offspring[mutating] = mutate_rows(offspring[mutating], self.rng)
+
+            fitness = fitness_components(offspring, self.instance)
+
+            if elitism:
+                # Replacing the worst offspring by the elite if the elite is better.
+                ranks = lexicographic_ranks(fitness)
+                if self.optim == "max":
+                    worst = int(np.argmin(ranks))
+                    replace = elite_fitness[0] > fitness[worst, 0]
+                else:
+                    worst = int(np.argmax(ranks))
+                    replace = elite_fitness[0] < fitness[worst, 0]
+                if replace:
+                    offspring[worst], fitness[worst] = elite_genome, elite_fitness
+
+            self.genomes, self.fitness = offspring, fitness
+
+            best = self.best_index()
+            self.fitnesses.append(int(self.fitness[best, 0]))
+            if reporter is not None:
+                reporter(GenerationRecord(self.gen, self.optim, self.genomes[best].tolist(),
+                                          tuple(self.fitness[best].tolist())))
+            self.gen += 1
+
+    def __len__(self):
+        return self.size
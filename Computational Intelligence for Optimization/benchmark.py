@@ -0,0 +1,298 @@
+from charles import Population, Individual
+from scheduling_problem import use_instance
+from problem_instance import ProblemInstance, load_instance
+from selection import selection_methods
+from mutation import mutation_methods
+from crossover import crossover_methods
+from pathlib import Path
+import subprocess
+import statistics
+import argparse
+import platform
+import random
+import json
+import sys
+import time
+import numpy as np
+
+# The column operators need the coverage encoding, so their genomes stay valid across repeated calls.
+coverage_operators = {"column_uniform_crossover", "column_single_point_co", "column_swap_mutation"}
+
+# Both data sheets and medium_hard scaled to 4 and 16 times the workers, the last one is skipped by --quick.
+instance_names = ["easy", "medium_hard", "medium_hard_x4", "medium_hard_x16"]
+
+
+def scaled_instance(instance, factor):
+    """Builds a larger instance by repeating every worker factor times, with the workers per shift multiplied.
+
+    Args:
+        instance (ProblemInstance): The instance to scale.
+        factor (int): Number of copies of each worker.
+
+    Returns:
+        ProblemInstance: The scaled instance, with the same days and shifts.
+    """
+    copies = [worker for _ in range(factor) for worker in range(instance.workers)]
+    return ProblemInstance(instance.days, instance.shifts, len(copies),
+                           [workers * factor for workers in instance.workers_per_shift],
+                           {i: instance.holidays[worker] for i, worker in enumerate(copies)},
+                           instance.skilled_shifts,
+                           {i: instance.skills[worker] for i, worker in enumerate(copies)},
+                           {i: instance.preferences[worker] for i, worker in enumerate(copies)})
+
+
+def benchmark_instances(names):
+    """Builds the instances of the suite with the given names, see instance_names."""
+    instances = {}
+    for name in names:
+        # The scaled instances are named after the data sheet and the factor, like medium_hard_x4.
+        data_sheet, _, factor = name.partition("_x")
+        instances[name] = load_instance(data_sheet) if not factor else \
+            scaled_instance(load_instance(data_sheet), int(factor))
+    return instances
+
+
+def time_call(function, repeats, min_time=0.05):
+    """Times a function, returning the median time per call over the repeats.
+
+    Each repeat calls the function enough times to last at least min_time seconds, so the fastest functions
+    aren't measured on a few calls only.
+    """
+    # Calling it once first, so lazily built structures and the interpreter caches are warm.
+    function()
+    # Doubling the number of calls until they take long enough, like timeit.autorange.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+def calibration(repeats=21):
+    """Times a fixed pure Python workload, to tell a slower machine from a slower code.
+
+    The workload takes about 50 ms and the median of many repeats is kept, so the calibration of a machine
+    varies much less between processes than the regression threshold.
+
+    Returns:
+        float: Seconds taken by the workload.
+    """
+    values = random.Random(0).sample(range(200000), 200000)
+
+    def workload():
+        sorted(sum(values[i:i + 10]) for i in range(0, len(values), 10))
+        {value % 1000: value for value in values}
+        sum(value * value for value in values if value % 3)
+
+    return time_call(workload, repeats)
+
+
+def same_machine(metadata, baseline_metadata):
+    """Checks if the metrics were measured on the machine of the baseline, with the same Python and numpy."""
+    return all(metadata.get(key) == baseline_metadata.get(key)
+               for key in ["node", "machine", "processor", "python", "numpy"])
+
+
+def benchmark_instance(name, instance, repeats=5, seed=0):
+    """Measures the fitness, evolve and operator metrics on one instance.
+
+    Args:
+        name (str): Name of the instance, used as the prefix of the metrics.
+        instance (ProblemInstance): The instance.
+        repeats (int): Number of repeats of each measure, the median one is kept.
+        seed (int): Seed of the populations and operators.
+
+    Returns:
+        dict: The metrics, keyed by name, each one a dict with its value, unit and whether higher is better.
+    """
+    metrics = {}
+
+    def record(metric, value, unit, higher_is_better):
+        metrics[f"{name}/{metric}"] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+    for encoding in ["binary", "coverage"]:
+        use_instance(instance, encoding)
+        pop = Population(size=100, optim="max", seed=seed)
+        rng = random.Random(seed)
+        genomes = np.array([individual.representation for individual in pop])
+        individual = pop[0]
+
+        if encoding == "binary":
+            # Fitness evaluations, one at a time, batched and incrementally after a swap.
+            record("fitness", 1 / time_call(individual.get_fitness, repeats), "evaluations/s", True)
+            record("fitness_batch", len(genomes) / time_call(lambda: Individual.get_fitness_batch(genomes), repeats),
+                   "evaluations/s", True)
+            mutated = individual.representation[:]
+            mutated[0], mutated[-1] = mutated[-1], mutated[0]
+            record("fitness_delta", 1 / time_call(
+                lambda: Individual.get_fitness_delta(individual.fitness, individual, mutated, [0, len(mutated) - 1]),
+                repeats), "evaluations/s", True)
+
+            # Generations of the best algorithm of the statistical analysis.
+            def evolve():
+                Population(size=100, optim="max", seed=seed).evolve(
+                    gens=5, select=selection_methods["rank"], mutate=mutation_methods["swap_mutation"],
+                    crossover=crossover_methods["uniform_crossover"], mut_prob=1.0, xo_prob=1.0, elitism=True,
+                    report="silent")
+            record("evolve", 5 / time_call(evolve, repeats), "generations/s", True)
+
+            # Drawing the parents of a generation, the wheel of fps and rank being rebuilt every generation.
+            def select_generation(select):
+                pop.selection_cache = None
+                for _ in range(len(pop)):
+                    select(pop)
+
+            for operator_name, select in selection_methods.items():
+                record(f"selection/{operator_name}", time_call(lambda: select_generation(select), repeats),
+                       "s/generation", False)
+
+        # The operators of each encoding, on members of the initial population.
+        for operator_name, crossover in crossover_methods.items():
+            if (operator_name in coverage_operators) == (encoding == "coverage"):
+                record(f"crossover/{operator_name}", time_call(lambda: crossover(pop[0], pop[1], rng=rng), repeats),
+                       "s/call", False)
+        for operator_name, mutate in mutation_methods.items():
+            if (operator_name in coverage_operators) == (encoding == "coverage"):
+                # Mutating the same genome over and over, every mutation keeps it valid.
+                genome = individual.representation[:]
+                record(f"mutation/{operator_name}", time_call(lambda: mutate(genome, rng=rng), repeats),
+                       "s/call", False)
+
+    return metrics
+
+
+def compare(metrics, baseline, threshold, speed=1.0):
+    """Finds the metrics that regressed by more than the threshold compared with a baseline.
+
+    Args:
+        metrics (dict): The current metrics.
+        baseline (dict): The metrics of the baseline.
+        threshold (float): Relative change allowed, 0.2 allows rates 20% lower and costs 20% higher.
+        speed (float): Speed of the machine compared with the one of the baseline (the ratio of the calibration
+            times), the current metrics are scaled by it.
+
+    Returns:
+        list: (name, baseline value, current value) of the regressions, the current value scaled.
+    """
+    regressions = []
+    for name, metric in metrics.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["value"]
+        after = metric["value"] / speed if metric["higher_is_better"] else metric["value"] * speed
+        if metric["higher_is_better"] and after < before * (1 - threshold):
+            regressions.append((name, before, after))
+        elif not metric["higher_is_better"] and after > before * (1 + threshold):
+            regressions.append((name, before, after))
+    return regressions
+
+
+def measure(names, repeats):
+    """Measures the calibration and the metrics of the instances with the given names in this process."""
+    metrics = {}
+    for instance_name, instance in benchmark_instances(names).items():
+        metrics.update(benchmark_instance(instance_name, instance, repeats=repeats))
+    return {"calibration": calibration(), "metrics": metrics}
+
+
+def measure_in_processes(names, repeats, processes):
+    """Measures the instances in fresh Python processes, one after the other.
+
+    The memory layout and the hash seed of a process make all of its timings a bit faster or slower, and measuring
+    again in the same process keeps that bias, so the measures are spread over several processes instead.
+
+    Returns:
+        list: The measures of each process, see measure.
+    """
+    measures = []
+    for _ in range(processes):
+        output = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--measure", *names,
+                                 "--repeats", str(repeats)], capture_output=True, text=True, check=True).stdout
+        measures.append(json.loads(output))
+    return measures
+
+
+def median_of(measures):
+    """Takes the median of the calibration and of each metric over the measures of several processes.
+
+    Returns:
+        tuple: The calibration in seconds and the metrics.
+    """
+    values = {}
+    metrics = {}
+    for measured in measures:
+        for name, metric in measured["metrics"].items():
+            values.setdefault(name, []).append(metric["value"])
+            metrics[name] = metric
+    calibration_seconds = statistics.median(measured["calibration"] for measured in measures)
+    return calibration_seconds, {name: dict(metric, value=statistics.median(values[name]))
+                                 for name, metric in metrics.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the speed of the fitness, evolve and every operator.")
+    parser.add_argument("--save", type=Path, default=None, help="saves the metrics as a json baseline")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="fails when a metric regressed past the threshold compared with this baseline")
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=5,
+                        help="number of fresh processes measuring the metrics, the median over them is kept")
+    parser.add_argument("--quick", action="store_true", help="skips the largest instance")
+    parser.add_argument("--confirm", type=int, default=2,
+                        help="number of times the instances with a regression are measured again before failing")
+    parser.add_argument("--measure", nargs="+", default=None, choices=instance_names,
+                        help="prints the measures of these instances in this process as json, used by the others")
+    arguments = parser.parse_args()
+
+    if arguments.measure is not None:
+        print(json.dumps(measure(arguments.measure, arguments.repeats)))
+        sys.exit()
+
+    names = instance_names[:-1] if arguments.quick else instance_names
+    measures = measure_in_processes(names, arguments.repeats, arguments.processes)
+    calibration_seconds, metrics = median_of(measures)
+
+    for name, metric in metrics.items():
+        print(f'{name:<56}{metric["value"]:>16.6g} {metric["unit"]}')
+
+    metadata = {"python": platform.python_version(), "numpy": np.__version__, "node": platform.node(),
+                "machine": platform.machine(), "processor": platform.processor(), "calibration": calibration_seconds}
+    if arguments.save is not None:
+        arguments.save.parent.mkdir(parents=True, exist_ok=True)
+        arguments.save.write_text(json.dumps({"metadata": metadata, "metrics": metrics}, indent=2))
+
+    if arguments.compare is not None:
+        baseline = json.loads(arguments.compare.read_text())
+        # Comparing at the speed of the machine of the baseline, as measured by the calibration workload, when
+        # the baseline comes from another machine. On the same machine the calibration would only add its noise.
+        speed = 1.0
+        if not same_machine(metadata, baseline["metadata"]):
+            speed = baseline["metadata"]["calibration"] / calibration_seconds
+            print(f"Machine speed compared with the baseline: {speed:.2f}")
+        regressions = compare(metrics, baseline["metrics"], arguments.threshold, speed)
+        # Measuring again the instances with a regression in fresh processes, and comparing the median over all
+        # the processes, so a short slowdown of the machine or an unlucky process isn't reported.
+        for _ in range(arguments.confirm):
+            if not regressions:
+                break
+            measures += measure_in_processes(sorted({name.split("/")[0] for name, _, _ in regressions}),
+                                             arguments.repeats, arguments.processes)
+            metrics = median_of(measures)[1]
+            regressions = compare(metrics, baseline["metrics"], arguments.threshold, speed)
+        for name, before, after in regressions:
+            print(f"Regression in {name}: {before:.6g} -> {after:.6g}")
+        if regressions:
+            sys.exit(1)
+        print(f"No metric regressed by more than {arguments.threshold:.0%}.")
@@ -1,22 +1,93 @@
-from random import shuffle, choice, sample, random, choices
+import random
 from operator import attrgetter
-from copy import deepcopy
-from pathlib import Path
-import csv
+from functools import partial
+from inspect import signature
+from heapq import heapify, heappop, nlargest, nsmallest
+from collections import OrderedDict
+from hashlib import blake2b
+from time import perf_counter
+from results import ResultsWriter
+from checkpoint import write_checkpoint, read_checkpoint, pack_random_state, unpack_random_state
+from reporters import GenerationRecord, get_reporter
+from profiling import EvolveStats
+from selection import select_many
+import numpy as np
+
+
+def derive_seeds(seed, n):
+    """Derives the seeds of independent runs from a single seed.
+
+    The seeds are spawned from a numpy SeedSequence, so the streams of the runs don't overlap, unlike seed + i
+    where run 1 of seed 0 is run 0 of seed 1.
+
+    Args:
+        seed (int): The seed of the experiment.
+        n (int): Number of seeds.
+
+    Returns:
+        list: The seeds, as 64 bit integers.
+    """
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(n)]
+
+
+def bind_rng(operator, rng):
+    """Passes the random generator of a population to an operator that accepts it.
+
+    The operators of crossover.py and mutation.py take an "rng" argument. Operators written with the original
+    signature, (individual) or (parent1, parent2), are returned as they are and keep drawing from the random
+    module, so a seeded population using them isn't reproducible.
+
+    Args:
+        operator (function): The crossover or mutation.
+        rng (random.Random): The generator of the population.
+
+    Returns:
+        function: The operator, with rng bound when it accepts it.
+    """
+    try:
+        parameters = signature(operator).parameters.values()
+    except (TypeError, ValueError):
+        return operator
+    if any(parameter.name == "rng" or parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+        return partial(operator, rng=rng)
+    return operator
 
 
 class Individual:
+    # Using slots instead of a per-instance __dict__, as populations hold many individuals.
+    __slots__ = ("representation", "fitness")
+
     def __init__(
             self,
-            representation=None
+            representation=None,
+            fitness=None
     ):
         if representation is None:
             self.representation = self.get_representation()
         else:
             self.representation = representation
-        self.fitness = self.get_fitness()
+        # The fitness can be given when it was already computed, for example by get_fitness_batch.
+        if fitness is None:
+            self.fitness = self.get_fitness()
+        else:
+            self.fitness = fitness
+
+    # Optional hook that scores a whole generation in one call. When monkey patched, it receives the genomes
+    # stacked in an array shaped (pop_size, genome_len) and returns one fitness per row.
+    get_fitness_batch = None
+
+    # Optional (rows, columns) shape of the genome, when it is a matrix flattened row by row. The column operators
+    # of crossover.py and mutation.py use it to keep the sum of every column.
+    layout = None
+
+    # Optional hook that updates a parent's fitness after a few genes changed. When monkey patched, it receives
+    # the parent's fitness, the parent, the offspring and the changed positions, and returns the new fitness.
+    get_fitness_delta = None
 
-    def get_representation(self):
+    # The representation hook doesn't depend on an individual, so the population can draw the representations
+    # before creating the individuals. It is monkey patched as a staticmethod receiving the random generator.
+    @staticmethod
+    def get_representation(rng=random):
         raise Exception("You need to monkey path the representation path.")
 
     def get_fitness(self):
@@ -38,11 +109,51 @@ class Individual:
         self.representation[position] = value
 
     def __repr__(self):
-        return f'{self.representation}'
+        return f'{list(self.representation)}'
+
+
+class FitnessCache:
+    """Bounded cache of fitnesses, keyed on a hash of the genome bytes.
+
+    When full, the least recently used fitness is evicted. The hits and misses counters show how many
+    evaluations were saved.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(representation):
+        return blake2b(bytes(representation), digest_size=16).digest()
+
+    def get(self, key):
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return fitness
+
+    def put(self, key, fitness):
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f'FitnessCache(hits={self.hits}, misses={self.misses}, size={len(self)}, maxsize={self.maxsize})'
 
 
 class Population:
-    def __init__(self, size, optim, filename=None, folder=None):
+    def __init__(self, size, optim, filename=None, folder=None, cache=None, compact=False, individuals=None,
+                 seed=None):
         self.individuals = []
         self.size = size
         self.optim = optim
@@ -50,140 +161,452 @@ class Population:
         self.fitnesses = []
         self.filename = filename
         self.folder = folder
+        # Buffers the fitness of each generation, it is written to the results file once the run finishes.
+        self.writer = ResultsWriter(fr"{folder}{filename}.bin") if filename is not None else None
+        # Optional FitnessCache, it can be shared between populations.
+        self.cache = cache
+        # Wheels of the selection methods, built once per generation (see selection.py).
+        self.selection_cache = None
+        # When compact, the genomes are held as bytearrays (one byte per gene) instead of lists of ints.
+        self.compact = compact
+        # Random generator passed to the representation and to every operator. With a seed, the population owns
+        # its generator, otherwise it draws from the random module like before.
+        self.rng = random if seed is None else random.Random(seed)
+        # Number of fitnesses computed, the ones found in the cache are not counted.
+        self.evaluations = 0
+        # Why and at which generation the last call to evolve stopped.
+        self.stop_reason = None
+        self.stop_gen = None
+        # EvolveStats of the generations evolved with profile=True.
+        self.stats = None
+        # Best fitness so far, the number of generations since it last improved and the seconds spent evolving,
+        # for the stagnation and time limit criteria. They go on from one call to evolve to the next and are saved
+        # in the checkpoints.
+        self.best_fitness = None
+        self.stagnant = 0
+        self.elapsed = 0.0
+
+        if individuals is not None:
+            # The individuals were already created, for example restored from a checkpoint.
+            self.individuals = individuals
+        elif Individual.get_fitness_batch is None and not compact:
+            for _ in range(size):
+                self.individuals.append(
+                    Individual(representation=Individual.get_representation(rng=self.rng))
+                )
+            self.evaluations += size
+        else:
+            # The representation functions don't depend on the individual, so we can draw all of them first
+            # and score them together.
+            self.individuals = self.evaluate([Individual.get_representation(rng=self.rng)
+                                              for _ in range(size)])
+
+    def evolve(self, gens, xo_prob, mut_prob, select, mutate, crossover, elitism, store=False, delta=False,
+               report="full", generation_gap=1.0, stagnation=None, target=None, max_evaluations=None,
+               time_limit=None, carry_forward=True, checkpoint=None, checkpoint_interval=10, local_search=None,
+               local_search_top=1, profile=False, track_memory=False):
+        """Evolves the population for the given number of generations, or until a stopping criterion is met.
+
+        The optional criteria are checked at the end of each generation, the first one met stops the run and is
+        recorded in stop_reason and stop_gen ("generations" when the run went through every generation). The
+        stagnation and time limit go on from the previous calls to evolve, like the generations.
+
+        The crossover and mutation receive the random generator of the population as "rng" when they accept it
+        (see bind_rng), and the mutation also receives "positions" with delta.
+
+        Args:
+            stagnation (int): Stops after this number of generations without improving the best fitness.
+            target (int): Stops once the best fitness reaches this value.
+            max_evaluations (int): Stops once the population computed this number of fitnesses in total.
+            time_limit (float): Stops after this number of seconds of wall-clock time.
+            carry_forward (bool): When stopping early, repeats the last best fitness for the generations left, in
+                fitnesses and in the stored results, so the curves of every run have the same length.
+            checkpoint (Path): When given, the population is saved to this file every checkpoint_interval
+                generations, see save_checkpoint.
+            local_search (function): When given, the best local_search_top offspring of each generation are
+                improved with it (a memetic algorithm). It receives the individual, optim and rng, like the
+                functions of local_search.py with their other arguments set (for example with functools.partial),
+                and returns the improved individual and the number of neighbours it scored, which are counted in
+                evaluations.
+            profile (bool): Accumulates the time and calls of each phase (selection, crossover, mutation,
+                evaluation, local search, elitism, report, store and checkpoint) in the stats of the population,
+                see profiling.py.
+            track_memory (bool): Also records the peak memory of each generation when profiling.
+        """
 
-        for _ in range(size):
-            self.individuals.append(
-                Individual()
-            )
-
-    def evolve(self, gens, xo_prob, mut_prob, select, mutate, crossover, elitism, store=False):
+        # The reporter receives a GenerationRecord each generation, see reporters.py for the levels.
+        reporter = get_reporter(report)
+
+        # With delta, the offspring that skip crossover are scored from their parent's fitness and the
+        # positions the mutation changed, so the mutation has to accept the "positions" argument.
+        if delta and Individual.get_fitness_delta is None:
+            raise Exception("You need to monkey patch the delta fitness path.")
+        if store and self.writer is None:
+            raise Exception("The population needs a filename to store its results, see Population(filename=...).")
+
+        # The number of elites kept each generation, elitism=True keeps one.
+        elites_count = int(elitism)
+
+        # With a generation gap below 1, only that share of the population is replaced each generation, the
+        # offspring taking the place of the worst individuals. A gap of 2 / size is a steady-state replacement.
+        offspring_count = self.size if generation_gap >= 1 else max(1, round(generation_gap * self.size))
+
+        crossover, mutate = bind_rng(crossover, self.rng), bind_rng(mutate, self.rng)
+
+        # The steps of each generation, wrapped with the timers of the stats when profiling.
+        select_parents, evaluate, fitness_delta = select_many, self.evaluate, Individual.get_fitness_delta
+        best_individuals, keep_elites = self.best_individuals, self.keep_elites
+        record = self.writer.record if store else None
+        save_checkpoint, flush = self.save_checkpoint, self.store
+        if profile:
+            if self.stats is None:
+                self.stats = EvolveStats(track_memory)
+            timed = self.stats.timed
+            select_parents, crossover, mutate = timed("selection", select_many), timed("crossover", crossover), \
+                timed("mutation", mutate)
+            evaluate = timed("evaluation", evaluate)
+            if fitness_delta is not None:
+                fitness_delta = timed("evaluation", fitness_delta)
+            if local_search is not None:
+                local_search = timed("local_search", local_search)
+            best_individuals, keep_elites = timed("elitism", best_individuals), timed("elitism", keep_elites)
+            if reporter is not None:
+                reporter = timed("report", reporter)
+            if store:
+                record, flush = timed("store", record), timed("store", flush)
+            save_checkpoint = timed("checkpoint", save_checkpoint)
+            self.stats.start()
+
+        start = perf_counter()
+        elapsed = self.elapsed
+        first_gen = self.gen
+        # Dropping the values a previous call carried forward, the generations they stood for are evolved now.
+        del self.fitnesses[self.gen - 1:]
+        if store and self.writer.first_gen is not None:
+            del self.writer.buffer[self.gen - self.writer.first_gen:]
+        self.stop_reason = "generations"
 
         for i in range(gens):
-            new_pop = []
-
-            if elitism:
-                if self.optim == "max":
-                    elite = deepcopy(max(self.individuals, key=attrgetter("fitness")))
-                elif self.optim == "min":
-                    elite = deepcopy(min(self.individuals, key=attrgetter("fitness")))
-
-            while len(new_pop) < self.size:
-                parent1, parent2 = select(self), select(self)
-
-                if random() < xo_prob:
+            if elites_count:
+                # The elites are shared with the new population instead of copied, the individuals of a
+                # population are never modified in place.
+                elites = best_individuals(elites_count)
+
+            # Selecting the parents of the whole generation in one call, so the wheel of fps and rank is only
+            # looked up once.
+            pairs = -(-offspring_count // 2)
+            parents = select_parents(self, select, 2 * pairs)
+
+            # Gathering the representations of the whole generation first, so they can be scored together.
+            offspring = []
+            fitnesses = []
+            for pair in range(pairs):
+                parent1, parent2 = parents[2 * pair], parents[2 * pair + 1]
+                # Positions changed since the parents, only tracked for the offspring that skip crossover.
+                changes1, changes2 = None, None
+
+                if self.rng.random() < xo_prob:
                     offspring1, offspring2 = crossover(parent1, parent2)
                 else:
-                    offspring1, offspring2 = parent1, parent2
-
-                if random() < mut_prob:
-                    offspring1 = mutate(offspring1)
-                if random() < mut_prob:
-                    offspring2 = mutate(offspring2)
-
-                new_pop.append(Individual(representation=offspring1))
-                if len(new_pop) < self.size:
-                    new_pop.append(Individual(representation=offspring2))
-
-            if elitism:
-                if self.optim == "max":
-                    worst = min(new_pop, key=attrgetter("fitness"))
-                    if elite.fitness[0] > worst.fitness[0]:
-                        new_pop.pop(new_pop.index(worst))
-                        new_pop.append(elite)
-
-                elif self.optim == "min":
-                    worst = max(new_pop, key=attrgetter("fitness"))
-                    if elite.fitness[0] < worst.fitness[0]:
-                        new_pop.pop(new_pop.index(worst))
-                        new_pop.append(elite)
+                    # Copying the parents, as the mutation works in place and the offspring are only scored
+                    # once the generation is complete.
+                    offspring1, offspring2 = parent1[:], parent2[:]
+                    if delta:
+                        changes1, changes2 = [], []
+
+                if self.rng.random() < mut_prob:
+                    offspring1 = mutate(offspring1, positions=changes1) if delta else mutate(offspring1)
+                if self.rng.random() < mut_prob:
+                    offspring2 = mutate(offspring2, positions=changes2) if delta else mutate(offspring2)
+
+                offspring.append(offspring1)
+                fitnesses.append(None if changes1 is None else
+                                 fitness_delta(parent1.fitness, parent1, offspring1, changes1))
+                if len(offspring) < offspring_count:
+                    offspring.append(offspring2)
+                    fitnesses.append(None if changes2 is None else
+                                     fitness_delta(parent2.fitness, parent2, offspring2, changes2))
+
+            # The fitnesses updated by get_fitness_delta are computed too.
+            self.evaluations += sum(fitness is not None for fitness in fitnesses)
+
+            new_pop = evaluate(offspring, fitnesses)
+
+            if local_search is not None:
+                # Refining the best offspring, the search returns new individuals.
+                for index in self.best_indexes(new_pop, local_search_top):
+                    new_pop[index], scored = local_search(new_pop[index], optim=self.optim, rng=self.rng)
+                    # The neighbours are scored incrementally, each one counts as an evaluation.
+                    self.evaluations += scored
+
+            if offspring_count < self.size:
+                # The offspring replace the worst individuals of the current population.
+                heap = self.worst_heap(self.individuals)
+                replaced = {heappop(heap)[1] for _ in range(offspring_count)}
+                new_pop = [individual for index, individual in enumerate(self.individuals)
+                           if index not in replaced] + new_pop
+
+            if elites_count:
+                new_pop = keep_elites(new_pop, elites)
 
             self.individuals = new_pop
 
             if self.optim == "max":
                 best_individual = max(self, key=attrgetter("fitness"))
-                print(f'------------------- Generation {self.gen} -------------------\n'
-                      f'Best Individual: {best_individual}\n'
-                      f'Fitness: {best_individual.fitness[0]}\n'
-                      f'Distributed Workers: {best_individual.fitness[1]}\n'
-                      f'Consecutive Shifts: {best_individual.fitness[2]}\n'
-                      f'Shifts in 2 Days: {best_individual.fitness[3]}\n'
-                      f'Shifts Not Completely Filled: {best_individual.fitness[4]}\n'
-                      f'Holidays Not Respected: {best_individual.fitness[5]}\n'
-                      f'Number of Failed Skilled Shifts: {best_individual.fitness[6]}\n'
-                      f'Number of Preferences Respected: {best_individual.fitness[7]}\n'
-                      f'Number of Preferences Not Respected: {best_individual.fitness[8]}\n')
-
-                # Adding the best fitness of each generation to the property fitnesses as this will be useful for
-                # grid-search and on choosing the best method.
-                self.fitnesses.append(best_individual.fitness[0])
-
             elif self.optim == "min":
-                worst_individual = min(self, key=attrgetter("fitness"))
-                print(f'------------------- Generation {self.gen} -------------------\n'
-                      f'Worst Individual: {worst_individual}\n'
-                      f'Fitness: {worst_individual.fitness[0]}\n'
-                      f'Distributed Workers: {worst_individual.fitness[1]}\n'
-                      f'Consecutive Shifts: {worst_individual.fitness[2]}\n'
-                      f'Shifts in 2 Days: {worst_individual.fitness[3]}\n'
-                      f'Shifts Not Completely Filled: {worst_individual.fitness[4]}\n'
-                      f'Holidays Not Respected: {worst_individual.fitness[5]}\n'
-                      f'Number of Failed Skilled Shifts: {worst_individual.fitness[6]}\n'
-                      f'Number of Preferences Respected: {worst_individual.fitness[7]}\n'
-                      f'Number of Preferences Not Respected: {worst_individual.fitness[8]}\n')
-
-                # Adding the worst fitness of each generation to the property fitnesses as this will be useful for
-                # grid-search and on choosing the best method.
-                self.fitnesses.append(worst_individual.fitness[0])
+                best_individual = min(self, key=attrgetter("fitness"))
+
+            # Adding the best fitness of each generation to the property fitnesses as this will be useful for
+            # grid-search and on choosing the best method.
+            self.fitnesses.append(best_individual.fitness[0])
+
+            # Updating the stopping criteria before the checkpoint, which saves them.
+            if self.best_fitness is None or \
+                    (self.optim == "max" and best_individual.fitness[0] > self.best_fitness) or \
+                    (self.optim == "min" and best_individual.fitness[0] < self.best_fitness):
+                self.best_fitness = best_individual.fitness[0]
+                self.stagnant = 0
+            else:
+                self.stagnant += 1
+            self.elapsed = elapsed + perf_counter() - start
+
+            if reporter is not None:
+                reporter(GenerationRecord(self.gen, self.optim, best_individual, best_individual.fitness))
 
             if store:
-                self.store(gens)
+                record(self.gen, max(self, key=attrgetter("fitness")).fitness[0])
             self.gen += 1
 
-    def store(self, num_gens):
-        """Stores the fitness value of each generation for each run.
-
-        Returns: A csv file with the info.
+            if checkpoint is not None and (self.gen - 1) % checkpoint_interval == 0:
+                save_checkpoint(checkpoint)
+
+            if profile:
+                self.stats.end_generation(self.gen - 1)
+
+            # Checking the stopping criteria.
+            if target is not None and ((self.optim == "max" and self.best_fitness >= target) or
+                                       (self.optim == "min" and self.best_fitness <= target)):
+                self.stop_reason = "target"
+            elif stagnation is not None and self.stagnant >= stagnation:
+                self.stop_reason = "stagnation"
+            elif max_evaluations is not None and self.evaluations >= max_evaluations:
+                self.stop_reason = "evaluations"
+            elif time_limit is not None and self.elapsed >= time_limit:
+                self.stop_reason = "time_limit"
+            if self.stop_reason != "generations":
+                break
+
+        self.stop_gen = self.gen - 1
+        if profile:
+            self.stats.stop()
+
+        if carry_forward and self.fitnesses:
+            # Repeating the last value for the generations left, without moving gen.
+            for gen in range(self.gen, first_gen + gens):
+                self.fitnesses.append(self.fitnesses[-1])
+                if store:
+                    record(gen, self.writer.buffer[-1])
+
+        if store:
+            flush()
+
+    def best_individuals(self, k):
+        """Finds the k best individuals of the population, the best one first."""
+        if self.optim == "max":
+            return nlargest(k, self.individuals, key=attrgetter("fitness"))
+        elif self.optim == "min":
+            return nsmallest(k, self.individuals, key=attrgetter("fitness"))
+
+    def best_indexes(self, individuals, k):
+        """Finds the positions of the k best individuals of a list, the best one first."""
+        if self.optim == "max":
+            return nlargest(k, range(len(individuals)), key=lambda index: individuals[index].fitness)
+        elif self.optim == "min":
+            return nsmallest(k, range(len(individuals)), key=lambda index: individuals[index].fitness)
+
+    def worst_heap(self, individuals):
+        """Builds a heap of (key, position) of the individuals, with the worst individual on top.
+
+        Ties are broken by position, so the first of the worst individuals comes first, like min and max.
         """
+        if self.optim == "max":
+            heap = [(individual.fitness, index) for index, individual in enumerate(individuals)]
+        elif self.optim == "min":
+            heap = [(tuple(-value for value in individual.fitness), index)
+                    for index, individual in enumerate(individuals)]
+        heapify(heap)
+        return heap
+
+    def keep_elites(self, new_pop, elites):
+        """Puts the elites in the new population, each one replacing the worst individual if it is better.
+
+        Args:
+            new_pop (list): The new population.
+            elites (list): The best individuals of the previous population, the best one first.
+
+        Returns:
+            list: The new population, with the replaced individuals removed and the elites at the end.
+        """
+        heap = self.worst_heap(new_pop)
+        present = {id(individual) for individual in new_pop}
+        replaced = set()
+        kept = []
+        for elite in elites:
+            # With a generation gap the elites may have survived already.
+            if id(elite) in present:
+                continue
+            if not heap:
+                break
+            worst = new_pop[heap[0][1]]
+            if (self.optim == "max" and elite.fitness[0] > worst.fitness[0]) or \
+                    (self.optim == "min" and elite.fitness[0] < worst.fitness[0]):
+                replaced.add(heappop(heap)[1])
+                kept.append(elite)
+            else:
+                # The next elites are not better and the next worst individuals are not worse.
+                break
+
+        if not kept:
+            return new_pop
+        return [individual for index, individual in enumerate(new_pop) if index not in replaced] + kept
+
+    def replace_worst(self, individuals):
+        """Puts already scored individuals in the population, in place of the worst ones.
+
+        Args:
+            individuals (list): The individuals to add, for example the migrants of another population.
+        """
+        heap = self.worst_heap(self.individuals)
+        replaced = {heappop(heap)[1] for _ in range(min(len(individuals), len(heap)))}
+        self.individuals = [individual for index, individual in enumerate(self.individuals)
+                            if index not in replaced] + list(individuals)
 
-        best_individual = max(self, key=attrgetter("fitness"))
-        # Will be used to count the number of lines in the file.
-        i = 0
-        # Creating the file path.
-        my_file = Path(fr"{self.folder}{self.filename}.csv")
-
-        # Checking if the file exists.
-        if my_file.is_file():
-            # If the file exists we count the number of lines in the file.
-            with open(fr"{self.folder}{self.filename}.csv") as f:
-                for i, l in enumerate(f):
-                    pass
-
-        # If all the generations aren't completed, the code opens the file
-        # in append mode and writes a row containing the number the generation
-        # and the fitness value of that generation.
-        if i < num_gens - 1:
-            with open(fr"{self.folder}{self.filename}.csv", "a", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow([self.gen, best_individual.fitness[0]])
-
-        # If it is completed, the code opens the file in read/write mode,
-        # and goes to the beginning of the file for writing.
-        else:
-            with open(fr"{self.folder}{self.filename}.csv", 'r+') as f:
-                lines = f.readlines()
-                # For each line, it checks if the first element matches
-                # the generation, if it does it update that line by
-                # stripping trailing whitespace and appending the fitness at the end.
-                for i, line in enumerate(lines):
-                    if line.split(",")[0] == f"{self.gen}":
-                        lines[i] = lines[i].strip() + f",{best_individual.fitness[0]}\n"
-                f.seek(0)
-                # Finally, the updated lines are written back to the file by iterating
-                # over them.
-                for line in lines:
-                    f.write(line)
-                # Truncate the file to the current cursor position.
-                f.truncate()
+    def evaluate(self, representations, fitnesses=None):
+        """Creates the individuals for a list of representations.
+
+        Args:
+            representations (list): Representations of the new individuals.
+            fitnesses (list): Optional fitnesses already known for some of the representations, None otherwise.
+
+        Returns:
+            list: The new individuals, scored with get_fitness_batch when it is available.
+        """
+        if fitnesses is None:
+            fitnesses = [None] * len(representations)
+        fitnesses = list(fitnesses)
+
+        # Packing the genomes, the operators return lists or slices of the parents' bytearrays.
+        if self.compact:
+            representations = [bytearray(representation) for representation in representations]
+
+        # Looking up the fitnesses we don't know yet in the cache.
+        keys = {}
+        if self.cache is not None:
+            for index, fitness in enumerate(fitnesses):
+                if fitness is None:
+                    keys[index] = self.cache.key(representations[index])
+                    fitnesses[index] = self.cache.get(keys[index])
+
+        pending = [index for index, fitness in enumerate(fitnesses) if fitness is None]
+        self.evaluations += len(pending)
+        if pending and Individual.get_fitness_batch is not None:
+            # Stacking the genomes still to be scored and scoring them in a single call.
+            if self.compact:
+                genomes = np.frombuffer(b"".join(representations[index] for index in pending),
+                                        dtype=np.uint8).reshape(len(pending), -1)
+            else:
+                genomes = np.array([list(representations[index]) for index in pending])
+            for index, fitness in zip(pending, Individual.get_fitness_batch(genomes)):
+                fitnesses[index] = fitness
+
+        individuals = [Individual(representation=representation, fitness=fitness)
+                       for representation, fitness in zip(representations, fitnesses)]
+
+        if self.cache is not None:
+            for index in pending:
+                self.cache.put(keys[index], individuals[index].fitness)
+
+        return individuals
+
+    def save_checkpoint(self, path):
+        """Saves the whole state of the population, with the state of its random generator, to a binary file.
+
+        A population restored from the checkpoint and evolved for the generations left follows the same
+        trajectory as the uninterrupted run, and stops at the same generation. The fitness cache is not saved.
+
+        Args:
+            path (Path): Checkpoint file, see checkpoint.py for the format.
+        """
+        settings = {"size": self.size, "optim": self.optim, "gen": self.gen, "compact": self.compact,
+                    "evaluations": self.evaluations, "own_rng": self.rng is not random,
+                    "stagnant": self.stagnant, "elapsed": self.elapsed}
+        if self.best_fitness is not None:
+            settings.update(best_fitness=self.best_fitness)
+        if self.filename is not None:
+            settings.update(filename=str(self.filename), folder=str(self.folder))
+        if self.writer is not None and self.writer.buffer:
+            settings.update(stored=np.array(self.writer.buffer, dtype=np.float64),
+                            stored_first_gen=self.writer.first_gen)
+            if self.writer.offset is not None:
+                settings.update(stored_offset=self.writer.offset, stored_length=self.writer.length)
+
+        write_checkpoint(path,
+                         genomes=np.frombuffer(b"".join(bytes(individual.representation) for individual in self),
+                                               dtype=np.uint8).reshape(len(self), -1),
+                         fitness=np.array([individual.fitness for individual in self.individuals],
+                                          dtype=np.float64),
+                         fitnesses=np.array(self.fitnesses, dtype=np.float64),
+                         random_state=pack_random_state(self.rng.getstate()),
+                         **settings)
+
+    @classmethod
+    def restore(cls, path, cache=None):
+        """Restores a population saved by save_checkpoint, and the state of its random generator.
+
+        Args:
+            path (Path): Checkpoint file.
+            cache (FitnessCache): Optional cache for the restored population.
+
+        Returns:
+            Population: The population, ready to be evolved for the generations left.
+        """
+        data = read_checkpoint(path)
+        compact = bool(data["compact"])
+        individuals = [Individual(representation=bytearray(genome.tobytes()) if compact else genome.tolist(),
+                                  fitness=tuple(fitness.tolist()))
+                       for genome, fitness in zip(data["genomes"], data["fitness"])]
+
+        pop = cls(size=int(data["size"]), optim=str(data["optim"]),
+                  filename=str(data["filename"]) if "filename" in data else None,
+                  folder=str(data["folder"]) if "folder" in data else None,
+                  cache=cache, compact=compact, individuals=individuals)
+        pop.gen = int(data["gen"])
+        pop.fitnesses = data["fitnesses"].tolist()
+        pop.evaluations = int(data["evaluations"])
+        pop.stagnant = int(data["stagnant"])
+        pop.elapsed = float(data["elapsed"])
+        if "best_fitness" in data:
+            pop.best_fitness = float(data["best_fitness"])
+        if "stored" in data:
+            pop.writer.first_gen = int(data["stored_first_gen"])
+            pop.writer.buffer = data["stored"].tolist()
+            if "stored_offset" in data:
+                pop.writer.offset = int(data["stored_offset"])
+                pop.writer.length = int(data["stored_length"])
+
+        # Populations without a seed draw from the random module, so its state is the one restored.
+        if bool(data["own_rng"]):
+            pop.rng = random.Random()
+        pop.rng.setstate(unpack_random_state(data["random_state"]))
+        return pop
+
+    def store(self):
+        """Stores the fitness value of each generation of the run so far.
+
+        Returns: A binary record appended to the results file, see results.py. The population is a single run,
+        so the record written by a previous call to evolve is extended instead of adding another run.
+        """
+        self.writer.flush()
 
     def __len__(self):
         return len(self.individuals)
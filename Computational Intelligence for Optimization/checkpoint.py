@@ -0,0 +1,52 @@
+from pathlib import Path
+import os
+import numpy as np
+
+# A checkpoint is a single uncompressed .npz file: the genomes as a (size, genome_length) uint8 array, the
+# fitnesses as a (size, components) float64 array, the curves and the random state as arrays, and the settings as
+# 0-d arrays. Nothing is pickled, so a checkpoint can be read without running any code.
+
+
+def write_checkpoint(path, **arrays):
+    """Writes the arrays of a checkpoint, replacing the previous one only once the new one is complete.
+
+    Args:
+        path (Path): Checkpoint file.
+        **arrays: The arrays to save, keyed by name.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Writing next to the checkpoint first, so a run killed while writing keeps its previous checkpoint.
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path):
+    """Reads the arrays of a checkpoint.
+
+    Args:
+        path (Path): File written by write_checkpoint.
+
+    Returns:
+        dict: The arrays, keyed by name.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def pack_random_state(state):
+    """Turns the state of a random generator (random.getstate or random.Random.getstate) into an array.
+
+    The state is the version, the 625 words of the Mersenne Twister and the next gauss value, which is NaN when
+    there is none.
+    """
+    version, words, gauss_next = state
+    return np.array([version, *words, np.nan if gauss_next is None else gauss_next], dtype=np.float64)
+
+
+def unpack_random_state(array):
+    """Rebuilds the state of a random generator from pack_random_state, for setstate."""
+    gauss_next = None if np.isnan(array[-1]) else float(array[-1])
+    return int(array[0]), tuple(int(word) for word in array[1:-1]), gauss_next
@@ -1,19 +1,21 @@
-from random import randint, uniform, sample, shuffle, random
+from charles import Individual
+import random
 
 
-def single_point_co(p1, p2):
+def single_point_co(p1, p2, rng=random):
     """Implementation of single point crossover.
 
     Args:
         p1 (Individual): First parent for crossover.
         p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individuals: Two offspring, resulting from the crossover.
     """
 
     # Choosing two points for the crossover to occur.
-    co_point = randint(1, len(p1) - 2)
+    co_point = rng.randint(1, len(p1) - 2)
 
     # Executing the crossover.
     offspring1 = p1[:co_point] + p2[co_point:]
@@ -22,81 +24,63 @@ def single_point_co(p1, p2):
     return offspring1, offspring2
 
 
-def cycle_xo_binary_input(p1, p2):
+def cycle_xo_binary_input(p1, p2, rng=random):
     """Implementation of cycle crossover.
 
     Args:
         p1 (Individual): First parent for crossover.
         p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individuals: Two offspring, resulting from the crossover.
     """
 
     # Shuffling the indexes.
-    index_list_1 = sample(range(len(p1)), len(p2))
-    index_list_2 = sample(range(len(p2)), len(p2))
-
-    # Offspring placeholders.
-    offspring1 = [None] * len(p1)
-    memory_offspring1 = [None] * len(p1)
-    offspring2 = [None] * len(p2)
-    memory_offspring2 = [None] * len(p2)
-
-    while None in offspring1:
-        index = offspring1.index(None)
-        val1 = index_list_1[index]
+    index_list_1 = rng.sample(range(len(p1)), len(p2))
+    index_list_2 = rng.sample(range(len(p2)), len(p2))
+
+    # Inverse of the first index list, the position of each index in it.
+    position_1 = [0] * len(p1)
+    for position, index in enumerate(index_list_1):
+        position_1[index] = position
+
+    # Following the cycle that starts at the first position. The indexes in the cycle are copied from the
+    # first parent to the first offspring, every other index is copied from the second parent. As before,
+    # when the cycle closes on the first position straight away, every index comes from the other parent.
+    in_cycle = [False] * len(p1)
+    val1 = index_list_1[0]
+    val2 = index_list_2[0]
+    index = 0
+    while val1 != val2:
+        in_cycle[index_list_1[index]] = True
         val2 = index_list_2[index]
+        index = position_1[val2]
 
-        # Copy the cycle elements.
-        while val1 != val2:
-            offspring1[index] = p1[index_list_1[index]]
-            memory_offspring1[index] = index_list_1[index]
-            offspring2[index] = p2[index_list_2[index]]
-            memory_offspring2[index] = index_list_2[index]
-            val2 = index_list_2[index]
-            index = index_list_1.index(val2)
+    offspring1 = [p1[i] if in_cycle[i] else p2[i] for i in range(len(p1))]
+    offspring2 = [p2[i] if in_cycle[i] else p1[i] for i in range(len(p2))]
 
-        # Copy the rest.
-        for element in offspring1:
-            if element is None:
-                index = offspring1.index(None)
-                if offspring1[index] is None:
-                    offspring1[index] = p2[index_list_2[index]]
-                    memory_offspring1[index] = index_list_2[index]
-                    offspring2[index] = p1[index_list_1[index]]
-                    memory_offspring2[index] = index_list_1[index]
-
-    offspring1_sorted = [0] * len(p1)
-    offspring2_sorted = [0] * len(p2)
-
-    # Reordering the indexes according to their original indexes.
-    for index, binary in zip(memory_offspring1, offspring1):
-        offspring1_sorted[index] = binary
-
-    for index, binary in zip(memory_offspring2, offspring2):
-        offspring2_sorted[index] = binary
-
-    return offspring1_sorted, offspring2_sorted
+    return offspring1, offspring2
 
 
-def pmx_binary_input(p1, p2):
+def pmx_binary_input(p1, p2, rng=random):
     """Implementation of partially matched crossover.
 
     Args:
         p1 (Individual): First parent for crossover.
         p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individuals: Two offspring, resulting from the crossover.
     """
 
     # Shuffling the indexes.
-    index_list_1 = sample(range(len(p1)), len(p2))
-    index_list_2 = sample(range(len(p2)), len(p2))
+    index_list_1 = rng.sample(range(len(p1)), len(p2))
+    index_list_2 = rng.sample(range(len(p2)), len(p2))
 
     # Choosing two random points to be the crossover points.
-    xo_points = sample(range(len(p1)), 2)
+    xo_points = rng.sample(range(len(p1)), 2)
     xo_points.sort()
 
     def pmx_offspring(x, y, index_list_x, index_list_y):
@@ -110,28 +94,31 @@ def pmx_binary_input(p1, p2):
         # Using the filled middle index to fill the binary offspring.
         o_binary[xo_points[0]:xo_points[1]] = [x[i] for i in o_cardinal[xo_points[0]:xo_points[1]]]
 
+        # Inverse of "index_list_y", the position of each index in it.
+        position_y = [0] * len(y)
+        for position, index in enumerate(index_list_y):
+            position_y[index] = position
+
         # Finding the values in the segment of "index_list_y" that are not in "index_list_x".
         z = set(index_list_y[xo_points[0]:xo_points[1]]) - set(index_list_x[xo_points[0]:xo_points[1]])
 
         # For the numbers that exist in the segment:
         for i in z:
-            temp = i
-            index = index_list_y.index(index_list_x[index_list_y.index(temp)])
+            index = position_y[index_list_x[position_y[i]]]
             if o_cardinal[index] is None:
                 o_cardinal[index] = i
                 o_binary[index] = y[i]
             else:
                 while o_cardinal[index] is not None:
-                    temp = index
-                    index = index_list_y.index(index_list_x[temp])
+                    index = position_y[index_list_x[index]]
                 o_cardinal[index] = i
                 o_binary[index] = x[i]
 
         # For the numbers that doesn't exist in the segment:
-        while None in o_cardinal:
-            index = o_cardinal.index(None)
-            o_cardinal[index] = index_list_y[index]
-            o_binary[index] = y[o_cardinal[index]]
+        for index in range(len(x)):
+            if o_cardinal[index] is None:
+                o_cardinal[index] = index_list_y[index]
+                o_binary[index] = y[o_cardinal[index]]
 
         # Reordering the indexes according to their original indexes.
         sorted_binary_list = [0] * len(x)
@@ -145,28 +132,83 @@ def pmx_binary_input(p1, p2):
     return offspring1, offspring2
 
 
-def uniform_crossover(p1, p2):
+def uniform_crossover(p1, p2, rng=random):
     """Implementation of uniform crossover for binary representations.
 
     Args:
         p1 (Individual): First parent for crossover.
         p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individuals: Two offspring, resulting from the crossover.
     """
 
-    # Starting the placeholders.
-    offspring1 = []
-    offspring2 = []
-    for i in range(len(p1)):
+    # Drawing the side of every index in a single call, one random bit per index.
+    sides = f"{rng.getrandbits(len(p1)):0{len(p1)}b}"
+    return masked_offspring(p1, p2, sides)
+
+
+def masked_offspring(p1, p2, sides):
+    """Builds the two offspring of a mask, index i of the first offspring comes from p1 when sides[i] is "1".
+
+    Args:
+        p1 (Individual): First parent for crossover.
+        p2 (Individual): Second parent for crossover.
+        sides (str): The mask, a string of "0" and "1" as long as the parents.
 
-        # Deciding to each offspring that specific index goes.
-        if random() < 0.5:
-            offspring1.append(p1[i])
-            offspring2.append(p2[i])
-        else:
-            offspring1.append(p2[i])
-            offspring2.append(p1[i])
+    Returns:
+        Individuals: Two offspring.
+    """
+    # Slicing the parents first, so their genes are read from the representations directly.
+    genes1, genes2 = p1[:], p2[:]
+    offspring1 = [x if side == "1" else y for x, y, side in zip(genes1, genes2, sides)]
+    offspring2 = [y if side == "1" else x for x, y, side in zip(genes1, genes2, sides)]
 
     return offspring1, offspring2
+
+
+def column_uniform_crossover(p1, p2, rng=random):
+    """Uniform crossover of whole columns, for genomes with a layout (see Individual.layout).
+
+    Each column of the offspring comes entirely from one of the parents, so when every column of the parents
+    has the right sum (the number of workers of each shift), so does every column of the offspring.
+
+    Args:
+        p1 (Individual): First parent for crossover.
+        p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        Individuals: Two offspring, resulting from the crossover.
+    """
+    rows, columns = Individual.layout
+    # Drawing the side of every column in a single call, and repeating the mask on every row.
+    sides = f"{rng.getrandbits(columns):0{columns}b}"
+    return masked_offspring(p1, p2, sides * rows)
+
+
+def column_single_point_co(p1, p2, rng=random):
+    """Single point crossover of whole columns, for genomes with a layout (see Individual.layout).
+
+    The columns before the point come from one parent and the columns after it from the other one, in every
+    row, so the sum of every column is kept.
+
+    Args:
+        p1 (Individual): First parent for crossover.
+        p2 (Individual): Second parent for crossover.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        Individuals: Two offspring, resulting from the crossover.
+    """
+    rows, columns = Individual.layout
+    co_point = rng.randint(1, columns - 1)
+    return masked_offspring(p1, p2, ("1" * co_point + "0" * (columns - co_point)) * rows)
+
+
+# The crossover methods by name, used to choose them from the grid-search and run configurations.
+crossover_methods = {"single_point_co": single_point_co, "cycle_xo_binary_input": cycle_xo_binary_input,
+                     "pmx_binary_input": pmx_binary_input, "uniform_crossover": uniform_crossover,
+                     "column_uniform_crossover": column_uniform_crossover,
+                     "column_single_point_co": column_single_point_co}
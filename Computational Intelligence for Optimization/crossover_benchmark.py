@@ -0,0 +1,45 @@
+from crossover import cycle_xo_binary_input, pmx_binary_input, single_point_co, uniform_crossover
+import argparse
+import random
+import timeit
+
+# The genome of the instances is days * shifts * workers long, the sizes go from the easy instance to
+# rosters much larger than the medium-hard one.
+genome_sizes = [504, 2016, 8064, 32256]
+
+
+def benchmark(operators, sizes, repeats=5, seed=0):
+    """Times each crossover operator on random binary parents of each genome size.
+
+    Args:
+        operators (dict): Crossover operators, keyed by name.
+        sizes (list): Genome sizes to time.
+        repeats (int): Number of calls timed per operator and size.
+        seed (int): Seed of the random parents and of the operators.
+
+    Returns:
+        dict: Seconds per call, keyed by (name, size).
+    """
+    timings = {}
+    for size in sizes:
+        random.seed(seed)
+        p1 = [random.randint(0, 1) for _ in range(size)]
+        p2 = [random.randint(0, 1) for _ in range(size)]
+        for name, operator in operators.items():
+            timings[(name, size)] = timeit.timeit(lambda: operator(p1, p2), number=repeats) / repeats
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shows how the crossover operators scale with the genome size.")
+    parser.add_argument("--repeats", type=int, default=5)
+    arguments = parser.parse_args()
+
+    operators = {"cycle_xo_binary_input": cycle_xo_binary_input, "pmx_binary_input": pmx_binary_input,
+                 "single_point_co": single_point_co, "uniform_crossover": uniform_crossover}
+    timings = benchmark(operators, genome_sizes, repeats=arguments.repeats)
+
+    # For a linear operator the time per gene stays roughly constant as the genome grows.
+    print(f'{"operator":<24}{"genome":>8}{"ms/call":>12}{"ns/gene":>12}')
+    for (name, size), seconds in timings.items():
+        print(f'{name:<24}{size:>8}{seconds * 1e3:>12.3f}{seconds * 1e9 / size:>12.1f}')
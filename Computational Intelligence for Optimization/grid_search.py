@@ -0,0 +1,160 @@
+from charles import Population, derive_seeds
+from selection import selection_methods
+from mutation import mutation_methods
+from crossover import crossover_methods
+from scheduling_problem import use_instance
+from problem_instance import load_instance
+from multiprocessing import Pool
+from pathlib import Path
+import hashlib
+import json
+import csv
+import numpy as np
+
+# The optional stopping criteria of Population.evolve a configuration can set. The runs that stop early carry
+# their last fitness forward, so every run has the same number of generations.
+stopping_criteria = ["stagnation", "target", "max_evaluations", "time_limit"]
+
+
+def expand_grid(configurations, runs, seed=0):
+    """Expands the configurations into independent jobs, one for each run of each configuration.
+
+    Args:
+        configurations (dict): Settings of each configuration, keyed by its name. The settings are the
+            arguments of Population and Population.evolve, with the operators given by name (the jobs are
+            pickled to reach the worker processes), plus the name of the problem instance and optionally its
+            "encoding" (see scheduling_problem.encodings).
+        runs (int): Number of runs of each configuration.
+        seed (int): Seed of the experiment. The seeds of the runs are derived from it (see charles.derive_seeds),
+            run i of every configuration getting the same seed.
+
+    Returns:
+        list: (name, configuration, run, seed) jobs.
+    """
+    seeds = derive_seeds(seed, runs)
+    return [(name, configuration, run, seeds[run]) for name, configuration in configurations.items()
+            for run in range(runs)]
+
+
+def run_job(job):
+    """Runs a single job of the grid-search.
+
+    Args:
+        job (tuple): (name, configuration, run, seed) job, as created by expand_grid.
+
+    Returns:
+        tuple: The name and run of the job, and the best fitness of each generation.
+    """
+    name, configuration, run, seed = job
+    use_instance(load_instance(configuration["instance"]), configuration.get("encoding", "binary"))
+
+    pop = Population(size=configuration["size"], optim=configuration["optim"], seed=seed)
+    pop.evolve(gens=configuration["gens"],
+               select=selection_methods[configuration["select"]],
+               mutate=mutation_methods[configuration["mutate"]],
+               crossover=crossover_methods[configuration["crossover"]],
+               mut_prob=configuration["mut_prob"],
+               xo_prob=configuration["xo_prob"],
+               elitism=configuration["elitism"],
+               report="silent",
+               **{criterion: configuration[criterion] for criterion in stopping_criteria if criterion in configuration})
+
+    return name, run, pop.fitnesses
+
+
+def job_key(job):
+    """Identifies a job by the settings of its configuration and its seed.
+
+    The journal records this key with every finished job, so a job is only skipped when it was run with exactly
+    the same settings and seed, and changing a configuration runs it again.
+
+    Args:
+        job (tuple): (name, configuration, run, seed) job, as created by expand_grid.
+
+    Returns:
+        str: The key, a hash of the settings and the seed.
+    """
+    _, configuration, _, seed = job
+    return hashlib.sha256(json.dumps([configuration, seed], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_finished(journal):
+    """Reads the jobs already finished from the journal.
+
+    Args:
+        journal (Path): csv file with one row per finished job: its key (see job_key), name, run and the fitness
+            of each generation.
+
+    Returns:
+        dict: Fitness of each generation, keyed by job key.
+    """
+    finished = {}
+    if Path(journal).is_file():
+        with open(journal, newline="") as file:
+            for row in csv.reader(file):
+                # Parsing with json keeps the integer fitnesses as integers.
+                finished[row[0]] = [json.loads(value) for value in row[3:]]
+    return finished
+
+
+def run_jobs(jobs, journal, finished, processes=None):
+    """Runs the jobs that are not finished yet on a process pool, recording each one in the journal.
+
+    Args:
+        jobs (list): (name, configuration, run, seed) jobs, as created by expand_grid.
+        journal (Path): csv file where the finished jobs are recorded.
+        finished (dict): Fitness of each generation of the finished jobs, keyed by job key (see load_finished).
+            The new jobs are added to it.
+        processes (int): Number of worker processes, all the cores by default.
+
+    Returns:
+        dict: Fitness of each generation of every job, keyed by (name, run).
+    """
+    journal = Path(journal)
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    keys = {(job[0], job[2]): job_key(job) for job in jobs}
+    # Running the jobs that aren't in the journal, once when several names share the same settings.
+    pending = {}
+    for job in jobs:
+        pending.setdefault(keys[(job[0], job[2])], job)
+    pending = [job for key, job in pending.items() if key not in finished]
+
+    if pending:
+        with Pool(processes) as pool, open(journal, "a", newline="") as file:
+            writer = csv.writer(file)
+            for name, run, fitnesses in pool.imap_unordered(run_job, pending):
+                key = keys[(name, run)]
+                writer.writerow([key, name, run] + fitnesses)
+                # Flushing after each job, so it isn't lost if the grid-search is interrupted.
+                file.flush()
+                finished[key] = fitnesses
+
+    return {(name, run): finished[key] for (name, run), key in keys.items()}
+
+
+def run_grid_search(configurations, runs, journal, seed=0, processes=None):
+    """Runs every configuration the given number of times on a process pool.
+
+    Every finished job is appended to the journal, so an interrupted grid-search resumes where it stopped
+    when it is called again with the same journal.
+
+    Args:
+        configurations (dict): Settings of each configuration, keyed by its name (see expand_grid).
+        runs (int): Number of runs of each configuration.
+        journal (Path): csv file where the finished jobs are recorded.
+        seed (int): Seed of the experiment, see expand_grid.
+        processes (int): Number of worker processes, all the cores by default.
+
+    Returns:
+        tuple: The average fitness per generation of each configuration, and the fitness per generation of
+            each run, keyed by (name, run).
+    """
+    finished = run_jobs(expand_grid(configurations, runs, seed), journal, load_finished(journal), processes)
+
+    # Doing the average of all the fitnesses of each configuration.
+    storing_dict = {}
+    for name in configurations:
+        fitness_accumulator = np.array([finished[(name, run)] for run in range(runs)], dtype=np.float64).sum(axis=0)
+        storing_dict[name] = fitness_accumulator / runs
+
+    return storing_dict, finished
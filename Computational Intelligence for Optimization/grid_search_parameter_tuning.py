@@ -1,60 +1,52 @@
-from charles import Population, Individual
-from selection import fps, tournament_sel, rank
-from mutation import binary_mutation, swap_mutation, inversion_mutation
-from crossover import single_point_co, cycle_xo_binary_input, pmx_binary_input, uniform_crossover
-from scheduling_problem import get_representation
-import numpy as np
+from grid_search import run_grid_search
+from results_store import ResultsStore
+from racing import race
 from pathlib import Path
 
-# Understand why do we need this here.
-Individual.get_representation = get_representation
-
 # The only difference between the best two combinations was on the mutation
 # technique. And so, when fine-tuning the mutation and crossover probability
 # we are still going to do it for two different models.
-mutation_methods = {"binary_mutation": binary_mutation,
-                    "swap_mutation": swap_mutation}
+mutation_names = ["binary_mutation", "swap_mutation"]
 
 # Jumping 0.20 each time on the probability of crossover and mutation:
 mutation_prob = {"0.2": 0.2, "0.4": 0.4, "0.6": 0.6, "0.8": 0.8, "1.0": 1.0}
 crossover_prob = {"0.2": 0.2, "0.4": 0.4, "0.6": 0.6, "0.8": 0.8, "1.0": 1.0}
 
-# Creating a dictionary called "store_dict" that will store the results.
-storing_dict = {}
-
-# For each mutation method.
-for mut_method, mut_function in mutation_methods.items():
-    # For each crossover probability.
-    for cross_value, cross_prob in crossover_prob.items():
-        # For each mutation probability.
-        for mutation_value, mut_prob in mutation_prob.items():
-
-            # Create an accumulator.
-            fitness_accumulator = np.array([0] * 100, dtype=np.float64)
-            # Run 35 times each algorithm.
-            for i in range(35):
-                # Starting the Population.
-                pop = Population(size=100,
-                                 optim="max",
-                                 filename=
-                                 f"/{cross_value}_{mutation_value}_{mut_method}",
-                                 folder=Path("hard_parameter_tuning") / "test")
-
-                pop.evolve(gens=100,
-                           select=rank,
-                           mutate=mut_function,
-                           crossover=uniform_crossover,
-                           mut_prob=mut_prob,
-                           xo_prob=cross_prob,
-                           elitism=True,
-                           store=True)
-
-                # Summing the values of every fitness for every generation.
-                fitness_accumulator += np.array(pop.fitnesses)
-
-            # Doing the average of all the fitnesses.
-            average_fitness_per_generation = fitness_accumulator / 35
-            storing_dict[cross_value + " / " + mutation_value + " / " + mut_method] = \
-                average_fitness_per_generation
-
-print(storing_dict.items())
+# Choosing the difficulty we are going to tackle: "easy" for the private hospital setting, stored in the
+# "easy_parameter_tuning" folder, or "medium_hard" for the public hospital setting, stored in "hard_parameter_tuning".
+instance = "medium_hard"
+folder = Path("easy_parameter_tuning" if instance == "easy" else "hard_parameter_tuning") / "test"
+# All the experiments are stored in a single results store, see results_store.py.
+store = Path("results.sqlite")
+
+# With racing, the configurations that are clearly worse are dropped after a few runs (see racing.py) and only
+# the best configuration is reported, instead of running all of them 35 times.
+racing = False
+
+if __name__ == "__main__":
+    # Creating one configuration for each mutation method, crossover probability and mutation probability.
+    configurations = {}
+    for mut_method in mutation_names:
+        for cross_value, cross_prob in crossover_prob.items():
+            for mutation_value, mut_prob in mutation_prob.items():
+                name = cross_value + " / " + mutation_value + " / " + mut_method
+                configurations[name] = {"instance": instance, "size": 100, "optim": "max", "gens": 100,
+                                        "select": "rank", "mutate": mut_method, "crossover": "uniform_crossover",
+                                        "mut_prob": mut_prob, "xo_prob": cross_prob, "elitism": True}
+
+    if racing:
+        best, means, runs_done, _ = race(configurations, journal=folder / "race.csv", max_runs=35)
+        print(f"Best configuration: {best}")
+        print(f"Runs: {sum(runs_done.values())} instead of {35 * len(configurations)}")
+        print(means)
+    else:
+        # Running each algorithm 35 times, in parallel. The finished runs are recorded in the journal, so an
+        # interrupted grid-search resumes where it stopped.
+        storing_dict, runs = run_grid_search(configurations, runs=35, journal=folder / "jobs.csv")
+
+        # Storing the fitness value of each generation for each run in the results store, next to the runs of the
+        # other experiments and instances.
+        with ResultsStore(store) as results_store:
+            results_store.add_grid_search("parameter_tuning", configurations, runs, runs=35)
+
+        print(storing_dict.items())
@@ -0,0 +1,136 @@
+from problem_instance import ProblemInstance
+from pathlib import Path
+import argparse
+import numpy as np
+
+
+def largest_remainder(shares, total):
+    """Splits a total into integers proportional to the shares, rounding by largest remainder.
+
+    Args:
+        shares (np.ndarray): Non-negative shares.
+        total (int): The total to split.
+
+    Returns:
+        np.ndarray: Integers summing to total.
+    """
+    exact = shares / shares.sum() * total
+    counts = np.floor(exact).astype(np.int64)
+    counts[np.argsort(counts - exact)[:total - counts.sum()]] += 1
+    return counts
+
+
+def generate_coverage(rng, workers, days, shifts, weekly_shifts=5):
+    """Draws the number of workers needed per shift.
+
+    The demand is set so each worker works weekly_shifts shifts a week on average, inside the 4 to 6 shifts a week
+    rewarded by the fitness. The first shift of a day is the busiest and the last one (the night) the quietest,
+    and the weekends need half the workers of a weekday, with some noise on every shift.
+    """
+    weekend = np.arange(days) % 7 >= 5
+    shift_weights = np.linspace(1.5, 0.5, shifts) if shifts > 1 else np.ones(1)
+    weights = (np.where(weekend, 0.5, 1.0)[:, np.newaxis] * shift_weights[np.newaxis, :]).ravel()
+    weights *= rng.uniform(0.8, 1.2, weights.size)
+    coverage = largest_remainder(weights, round(workers * weekly_shifts * days / 7))
+    return np.minimum(coverage, workers).astype(np.int32)
+
+
+def generate_holidays(rng, workers, days, shifts, vacation_share=0.1, vacation_days=(3, 7)):
+    """Draws the holidays: a rest day every week for everybody, and a block of vacation days for some workers."""
+    holidays = np.zeros((workers, days), dtype=np.int8)
+    weeks = -(-days // 7)
+    rest_days = np.arange(weeks)[np.newaxis, :] * 7 + rng.integers(0, 7, (workers, weeks))
+    for worker, day in zip(*np.nonzero(rest_days < days)):
+        holidays[worker, rest_days[worker, day]] = 1
+
+    for worker in np.flatnonzero(rng.random(workers) < vacation_share):
+        length = min(int(rng.integers(vacation_days[0], vacation_days[1] + 1)), days)
+        start = int(rng.integers(0, days - length + 1))
+        holidays[worker, start:start + length] = 1
+
+    # A day of holidays covers all of its shifts.
+    return np.repeat(holidays, shifts, axis=1)
+
+
+def generate_preferences(rng, workers, days, shifts, holidays, preference_share=0.15):
+    """Draws the preferences, each worker mostly liking one shift of the day and disliking the others.
+
+    A worker expresses a preference on preference_share of the shifts, which is to work (1) with probability 0.8
+    on their favourite shift of the day and 0.3 on the other ones, and not to work (-1) otherwise. There is no
+    preference on the holidays.
+    """
+    favourite = rng.integers(0, shifts, workers)
+    likes = np.tile(np.arange(shifts), days)[np.newaxis, :] == favourite[:, np.newaxis]
+    expressed = (rng.random(holidays.shape) < preference_share) & (holidays == 0)
+    positive = rng.random(holidays.shape) < np.where(likes, 0.8, 0.3)
+    return np.where(expressed, np.where(positive, 1, -1), 0).astype(np.int8)
+
+
+def generate_skills(rng, workers, coverage, skills=6, skilled_share=0.1):
+    """Draws the skills of the workers and the skills required by the skilled shifts.
+
+    Each skill is common or rare (held by 20% to 70% of the workers) and every worker has at least one. About
+    skilled_share of the shifts require one skill, or two for a third of them. A requirement is dropped when
+    fewer workers have the skills than the shift needs, so every instance can be solved on the skills.
+
+    Returns:
+        tuple: The skill names, the (workers, skills) matrix of the skills of each worker and the
+        (shifts, skills) matrix of the skills required by each shift.
+    """
+    skill_names = [f"skill{k + 1}" for k in range(skills)]
+    held = rng.random((workers, skills)) < rng.uniform(0.2, 0.7, skills)[np.newaxis, :]
+    held[np.arange(workers), rng.integers(0, skills, workers)] = True
+
+    required_skills = np.zeros((coverage.size, skills), dtype=bool)
+    for shift in np.flatnonzero((rng.random(coverage.size) < skilled_share) & (coverage > 0)):
+        required = rng.choice(skills, size=1 if rng.random() < 2 / 3 else min(2, skills), replace=False)
+        if (held[:, required].all(axis=1)).sum() >= coverage[shift]:
+            required_skills[shift, required] = True
+    return skill_names, held, required_skills
+
+
+def generate_instance(workers, days=28, shifts=3, skills=6, seed=0, weekly_shifts=5, vacation_share=0.1,
+                      preference_share=0.15, skilled_share=0.1):
+    """Generates a scheduling instance of any size, with the same kind of data as the data sheets.
+
+    The same arguments and seed always give the same instance.
+
+    Args:
+        workers (int): Number of workers.
+        days (int): Number of days, the first one being a Monday.
+        shifts (int): Number of shifts per day.
+        skills (int): Number of skills.
+        seed (int): Seed of the random generator.
+        weekly_shifts (float): Average number of shifts a week each worker is needed for.
+        vacation_share (float): Share of the workers with a block of vacation days.
+        preference_share (float): Share of the shifts on which a worker expresses a preference.
+        skilled_share (float): Share of the shifts requiring skills.
+
+    Returns:
+        ProblemInstance: The instance.
+    """
+    rng = np.random.default_rng(seed)
+    coverage = generate_coverage(rng, workers, days, shifts, weekly_shifts)
+    holidays = generate_holidays(rng, workers, days, shifts, vacation_share)
+    preferences = generate_preferences(rng, workers, days, shifts, holidays, preference_share)
+    skill_names, held, required_skills = generate_skills(rng, workers, coverage, skills, skilled_share)
+    return ProblemInstance.from_arrays(days, shifts, coverage, holidays, preferences, skill_names, held,
+                                       required_skills)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generates a scheduling instance and saves it as a folder of memory mappable arrays, which "
+                    "run_scheduling.py and the grid-search accept as the instance.")
+    parser.add_argument("path", type=Path, help="folder of the instance")
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=91)
+    parser.add_argument("--shifts", type=int, default=3)
+    parser.add_argument("--skills", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    instance = generate_instance(arguments.workers, arguments.days, arguments.shifts, arguments.skills,
+                                 arguments.seed)
+    instance.save(arguments.path)
+    print(f"Saved {instance} to {arguments.path}, {int(instance.coverage.sum())} worker shifts to fill.")
@@ -0,0 +1,183 @@
+from charles import Population, Individual, derive_seeds
+from selection import selection_methods
+from mutation import mutation_methods
+from crossover import crossover_methods
+from scheduling_problem import use_instance
+from problem_instance import load_instance
+from reporters import GenerationRecord, get_reporter
+from multiprocessing import Process, Queue
+import traceback
+
+
+def ring_topology(islands):
+    """Each island sends its migrants to the next one, the last island to the first one."""
+    return {island: [(island + 1) % islands] for island in range(islands)}
+
+
+def full_topology(islands):
+    """Each island sends its migrants to every other island."""
+    return {island: [target for target in range(islands) if target != island] for island in range(islands)}
+
+
+# The migration topologies, keyed by name. Each one gives the islands every island sends its migrants to.
+topologies = {"ring": ring_topology, "full": full_topology}
+
+
+def run_island(island, configuration, instance, optim, gens, interval, migrants, seed, inbox, outboxes, sources,
+               results):
+    """Evolves a single island in its own process, exchanging migrants with the other islands.
+
+    Every interval generations, the island sends copies of its best individuals to the islands of its outboxes
+    and waits for the migrants of its sources, which replace its worst individuals. The progress of each
+    epoch is sent to the results queue.
+
+    Args:
+        island (int): Index of the island.
+        configuration (dict): Settings of the island, the arguments of Population and Population.evolve with
+            the operators given by name.
+        instance (str): Name of the problem instance.
+        optim (str): "max" or "min".
+        gens (int): Number of generations.
+        interval (int): Number of generations between migrations.
+        migrants (int): Number of individuals sent to each neighbour.
+        seed (int): Seed of the random generator of the island.
+        inbox (Queue): Queue where the other islands put the migrants of this one.
+        outboxes (list): Queues of the islands this one sends its migrants to.
+        sources (int): Number of islands sending migrants to this one.
+        results (Queue): Queue where the progress is sent.
+    """
+    try:
+        use_instance(load_instance(instance), configuration.get("encoding", "binary"))
+
+        pop = Population(size=configuration["size"], optim=optim, seed=seed)
+        done = 0
+        while done < gens:
+            epoch = min(interval, gens - done)
+            pop.evolve(gens=epoch,
+                       select=selection_methods[configuration["select"]],
+                       mutate=mutation_methods[configuration["mutate"]],
+                       crossover=crossover_methods[configuration["crossover"]],
+                       mut_prob=configuration["mut_prob"],
+                       xo_prob=configuration["xo_prob"],
+                       elitism=configuration["elitism"],
+                       report="silent")
+            done += epoch
+
+            best = pop.best_individuals(1)[0]
+            results.put(("epoch", island, pop.fitnesses[-epoch:], best.representation, best.fitness))
+
+            if done < gens and sources:
+                # Sending the best individuals as (representation, fitness), so they aren't scored again.
+                emigrants = [(individual.representation, individual.fitness)
+                             for individual in pop.best_individuals(migrants)]
+                for outbox in outboxes:
+                    outbox.put((island, emigrants))
+
+                # Sorting the arrivals by island, so the runs don't depend on the order the processes finish.
+                arrivals = sorted(inbox.get() for _ in range(sources))
+                pop.replace_worst([Individual(representation=representation[:], fitness=fitness)
+                                   for _, emigrants in arrivals for representation, fitness in emigrants])
+    except Exception:
+        results.put(("error", island, traceback.format_exc()))
+
+
+class IslandModel:
+    """Several populations evolved in parallel processes, exchanging their best individuals periodically.
+
+    Each island is a Population with its own settings, so islands can use different selection, crossover and
+    mutation methods. Every migration_interval generations, each island sends its best individuals to its
+    neighbours in the topology, where they replace the worst individuals.
+    """
+
+    def __init__(self, islands, instance, optim="max", migration_interval=10, migrants=1, topology="ring",
+                 seed=None):
+        """
+        Args:
+            islands (list): Settings of each island, as in the grid-search configurations: size, select,
+                mutate, crossover, mut_prob, xo_prob and elitism, with the operators given by name, and
+                optionally the encoding.
+            instance (str): Name of the problem instance.
+            optim (str): "max" or "min".
+            migration_interval (int): Number of generations between migrations.
+            migrants (int): Number of individuals each island sends to each neighbour.
+            topology (str): "ring" or "full".
+            seed (int): Seed of the model, the seeds of the islands are derived from it.
+        """
+        if topology not in topologies:
+            raise Exception(f"Unknown topology {topology}, choose one of {list(topologies)}.")
+        self.islands = islands
+        self.instance = instance
+        self.optim = optim
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.topology = topology
+        self.seed = seed
+        self.gen = 1
+        # Best fitness of each generation across all the islands, and of each island.
+        self.fitnesses = []
+        self.island_fitnesses = [[] for _ in islands]
+        self.best = None
+
+    def evolve(self, gens, report="silent"):
+        """Runs every island for the given number of generations.
+
+        Args:
+            gens (int): Number of generations of each island.
+            report (str or callable): Reporter of the merged progress, it receives the best individual across
+                the islands once per migration epoch.
+        """
+        reporter = get_reporter(report)
+        targets = topologies[self.topology](len(self.islands))
+        inboxes = [Queue() for _ in self.islands]
+        results = Queue()
+
+        seeds = derive_seeds(self.seed, len(self.islands))
+        processes = []
+        for island, configuration in enumerate(self.islands):
+            sources = sum(island in targets[source] for source in targets)
+            seed = seeds[island]
+            processes.append(Process(target=run_island, args=(
+                island, configuration, self.instance, self.optim, gens, self.migration_interval, self.migrants,
+                seed, inboxes[island], [inboxes[target] for target in targets[island]], sources, results)))
+        for process in processes:
+            process.start()
+
+        try:
+            # Merging the epochs as they arrive, a generation is complete once every island sent it.
+            epochs = -(-gens // self.migration_interval)
+            pending = {}
+            for _ in range(epochs * len(self.islands)):
+                message = results.get()
+                if message[0] == "error":
+                    raise Exception(f"Island {message[1]} failed:\n{message[2]}")
+                _, island, fitnesses, representation, fitness = message
+                self.island_fitnesses[island].extend(fitnesses)
+                self.keep_best(Individual(representation=representation, fitness=fitness))
+
+                epoch = -(-len(self.island_fitnesses[island]) // self.migration_interval)
+                pending[epoch] = pending.get(epoch, 0) + 1
+                if pending[epoch] == len(self.islands):
+                    self.merge_progress(reporter)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    def keep_best(self, individual):
+        if self.best is None or (self.optim == "max" and individual.fitness > self.best.fitness) or \
+                (self.optim == "min" and individual.fitness < self.best.fitness):
+            self.best = individual
+
+    def merge_progress(self, reporter):
+        """Adds the generations every island finished to the merged fitnesses."""
+        finished = min(len(fitnesses) for fitnesses in self.island_fitnesses)
+        choose = max if self.optim == "max" else min
+        for gen in range(len(self.fitnesses), finished):
+            self.fitnesses.append(choose(fitnesses[gen] for fitnesses in self.island_fitnesses))
+        self.gen = finished + 1
+        if reporter is not None:
+            reporter(GenerationRecord(finished, self.optim, self.best, self.best.fitness))
+
+    def __len__(self):
+        return len(self.islands)
@@ -0,0 +1,84 @@
+from math import exp
+import random
+
+
+def improves(candidate, individual, optim):
+    """Checks if the candidate has a strictly better fitness than the individual."""
+    if optim == "max":
+        return candidate.fitness[0] > individual.fitness[0]
+    elif optim == "min":
+        return candidate.fitness[0] < individual.fitness[0]
+    raise Exception("No optimization specified (min or max).")
+
+
+def hill_climbing(individual, neighbourhood, optim="max", steps=100, neighbours=5, rng=random):
+    """Stochastic hill climbing from an individual.
+
+    Each step draws a few neighbours with Individual.get_neighbours, which scores them incrementally, and moves
+    to the best one if it improves the fitness.
+
+    Args:
+        individual (Individual): Starting point, it isn't modified.
+        neighbourhood (function): Neighbourhood passed to get_neighbours, see neighbourhoods.py.
+        optim (str): "max" or "min".
+        steps (int): Number of steps.
+        neighbours (int): Number of neighbours drawn each step.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        tuple: The best individual found and the number of neighbours scored.
+    """
+    scored = 0
+    for _ in range(steps):
+        candidates = individual.get_neighbours(neighbourhood, n=neighbours, rng=rng)
+        scored += len(candidates)
+        if not candidates:
+            continue
+        if optim == "max":
+            candidate = max(candidates, key=lambda neighbour: neighbour.fitness[0])
+        else:
+            candidate = min(candidates, key=lambda neighbour: neighbour.fitness[0])
+        if improves(candidate, individual, optim):
+            individual = candidate
+    return individual, scored
+
+
+def simulated_annealing(individual, neighbourhood, optim="max", steps=1000, temperature=100, cooling=0.995,
+                        rng=random):
+    """Simulated annealing from an individual.
+
+    Each step draws one neighbour, accepted when it is not worse or, when it is worse by delta, with probability
+    exp(-delta / temperature). The temperature is multiplied by cooling after every step.
+
+    Args:
+        individual (Individual): Starting point, it isn't modified.
+        neighbourhood (function): Neighbourhood passed to get_neighbours, see neighbourhoods.py.
+        optim (str): "max" or "min".
+        steps (int): Number of steps.
+        temperature (float): Initial temperature, in fitness units.
+        cooling (float): Cooling factor of the temperature.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        tuple: The best individual found and the number of neighbours scored.
+    """
+    best = current = individual
+    scored = 0
+    for _ in range(steps):
+        candidates = current.get_neighbours(neighbourhood, n=1, rng=rng)
+        scored += len(candidates)
+        if candidates:
+            candidate = candidates[0]
+            delta = candidate.fitness[0] - current.fitness[0]
+            if optim == "min":
+                delta = -delta
+            if delta >= 0 or rng.random() < exp(delta / temperature):
+                current = candidate
+                if improves(current, best, optim):
+                    best = current
+        temperature *= cooling
+    return best, scored
+
+
+# The local searches by name, used to choose them from the run configurations.
+local_search_methods = {"hill_climbing": hill_climbing, "simulated_annealing": simulated_annealing}
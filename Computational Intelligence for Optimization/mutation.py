@@ -1,11 +1,14 @@
-from random import randint, sample
+from charles import Individual
+import random
 
 
-def binary_mutation(individual):
+def binary_mutation(individual, positions=None, rng=random):
     """Binary mutation for a GA individual. Flips the bits.
 
     Args:
         individual (Individual): A GA individual from charles.py
+        positions (list): Optional list where the mutated index is appended.
+        rng (random.Random): Random generator, the random module by default.
 
     Raises:
         Exception: When individual is not binary encoded.py
@@ -13,7 +16,9 @@ def binary_mutation(individual):
     Returns:
         Individual: Mutated Individual
     """
-    mut_index = randint(0, len(individual) - 1)
+    mut_index = rng.randint(0, len(individual) - 1)
+    if positions is not None:
+        positions.append(mut_index)
 
     if individual[mut_index] == 0:
         individual[mut_index] = 1
@@ -25,30 +30,72 @@ def binary_mutation(individual):
     return individual
 
 
-def swap_mutation(individual):
+def swap_mutation(individual, positions=None, rng=random):
     """Swap mutation for a GA individual. Swaps the bits.
 
     Args:
         individual (Individual): A GA individual from charles.py
+        positions (list): Optional list where the swapped indexes are appended.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individual: Mutated Individual
     """
-    mut_indexes = sample(range(0, len(individual)), 2)
+    mut_indexes = rng.sample(range(0, len(individual)), 2)
+    if positions is not None:
+        positions.extend(mut_indexes)
     individual[mut_indexes[0]], individual[mut_indexes[1]] = individual[mut_indexes[1]], individual[mut_indexes[0]]
     return individual
 
 
-def inversion_mutation(individual):
+def inversion_mutation(individual, positions=None, rng=random):
     """Inversion mutation for a GA individual. Reverts a portion of the representation.
 
     Args:
         individual (Individual): A GA individual from charles.py
+        positions (list): Optional list where the reverted indexes are appended.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individual: Mutated Individual
     """
-    mut_indexes = sample(range(0, len(individual)), 2)
+    mut_indexes = rng.sample(range(0, len(individual)), 2)
     mut_indexes.sort()
+    if positions is not None:
+        positions.extend(range(mut_indexes[0], mut_indexes[1]))
     individual[mut_indexes[0]:mut_indexes[1]] = individual[mut_indexes[0]:mut_indexes[1]][::-1]
-    return individual
\ No newline at end of file
+    return individual
+
+
+def column_swap_mutation(individual, positions=None, rng=random):
+    """Swap mutation inside a column, for genomes with a layout (see Individual.layout).
+
+    A 1 and a 0 of the same column are swapped, moving a shift from one worker to another, so the sum of every
+    column is kept. The columns that are all 0 or all 1 are skipped.
+
+    Args:
+        individual (Individual): A GA individual from charles.py
+        positions (list): Optional list where the swapped indexes are appended.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        Individual: Mutated Individual
+    """
+    rows, columns = Individual.layout
+    start = rng.randrange(columns)
+    for column in range(start, start + columns):
+        column %= columns
+        ones = [row * columns + column for row in range(rows) if individual[row * columns + column] == 1]
+        if 0 < len(ones) < rows:
+            zeros = [row * columns + column for row in range(rows) if individual[row * columns + column] != 1]
+            mut_indexes = [rng.choice(ones), rng.choice(zeros)]
+            if positions is not None:
+                positions.extend(mut_indexes)
+            individual[mut_indexes[0]], individual[mut_indexes[1]] = 0, 1
+            break
+    return individual
+
+
+# The mutation methods by name, used to choose them from the grid-search and run configurations.
+mutation_methods = {"binary_mutation": binary_mutation, "swap_mutation": swap_mutation,
+                    "inversion_mutation": inversion_mutation, "column_swap_mutation": column_swap_mutation}
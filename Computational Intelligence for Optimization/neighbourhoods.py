@@ -0,0 +1,91 @@
+import random
+
+# The neighbourhoods of a schedule. Each function draws a single random move of the genome, as a dict of the
+# positions it changes and their new values, or None when it has no move to offer. Individual.get_neighbours
+# applies the moves and scores them incrementally (see scheduling_problem.use_instance).
+
+
+def shift_swap(genome, instance, rng=random):
+    """Gives a shift of a worker to another worker that doesn't work it, keeping the workers of every shift.
+
+    Args:
+        genome (list): The representation.
+        instance (ProblemInstance): The problem being solved.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        dict: The move, None when every shift has either all the workers or none.
+    """
+    total_shifts = instance.total_shifts
+    start = rng.randrange(total_shifts)
+    for shift in range(start, start + total_shifts):
+        shift %= total_shifts
+        working = [worker * total_shifts + shift for worker in range(instance.workers)
+                   if genome[worker * total_shifts + shift] == 1]
+        if 0 < len(working) < instance.workers:
+            free = [worker * total_shifts + shift for worker in range(instance.workers)
+                    if genome[worker * total_shifts + shift] != 1]
+            return {rng.choice(working): 0, rng.choice(free): 1}
+    return None
+
+
+def shift_move(genome, instance, rng=random):
+    """Moves a shift of a worker to another shift of the same worker, keeping the number of shifts per worker.
+
+    Args:
+        genome (list): The representation.
+        instance (ProblemInstance): The problem being solved.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        dict: The move, None when the worker works every shift or none.
+    """
+    total_shifts = instance.total_shifts
+    start = rng.randrange(instance.workers) * total_shifts
+    calendar = genome[start:start + total_shifts]
+    working = [shift for shift in range(total_shifts) if calendar[shift] == 1]
+    if not 0 < len(working) < total_shifts:
+        return None
+    free = [shift for shift in range(total_shifts) if calendar[shift] != 1]
+    return {start + rng.choice(working): 0, start + rng.choice(free): 1}
+
+
+def two_day_repair(genome, instance, rng=random):
+    """Repairs a 2-day span where a worker works more than 3 shifts, giving one of them to another worker.
+
+    The shift goes preferably to a worker with less than 3 shifts in the same span, so the repair doesn't
+    overload somebody else.
+
+    Args:
+        genome (list): The representation.
+        instance (ProblemInstance): The problem being solved.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        dict: The move, None when there is nothing to repair.
+    """
+    total_shifts, span = instance.total_shifts, 2 * instance.shifts
+
+    # Finding the overloaded spans, as (worker, first shift of the span).
+    load = {}
+    for worker in range(instance.workers):
+        for first in range(0, total_shifts, span):
+            start = worker * total_shifts + first
+            load[(worker, first)] = sum(genome[start:start + min(span, total_shifts - first)])
+    overloaded = [key for key, shifts in load.items() if shifts > 3]
+    if not overloaded:
+        return None
+
+    worker, first = rng.choice(overloaded)
+    shift = rng.choice([first + j for j in range(min(span, total_shifts - first))
+                        if genome[worker * total_shifts + first + j] == 1])
+    free = [other for other in range(instance.workers) if genome[other * total_shifts + shift] != 1]
+    if not free:
+        return None
+    light = [other for other in free if load[(other, first)] < 3]
+    other = rng.choice(light or free)
+    return {worker * total_shifts + shift: 0, other * total_shifts + shift: 1}
+
+
+# The neighbourhoods by name, used to choose them from the run configurations.
+neighbourhood_methods = {"shift_swap": shift_swap, "shift_move": shift_move, "two_day_repair": two_day_repair}
@@ -0,0 +1,195 @@
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+import json
+import numpy as np
+
+# The data sheets of each difficulty level. The private hospital setting is the easy one and the public
+# hospital setting is the medium-hard one.
+instance_modules = {"easy": "data_easy", "medium_hard": "data_medium_hard"}
+
+
+class ProblemInstance:
+    """Data of a scheduling problem, with the constraint matrices precomputed once.
+
+    The matrices have one row per worker and one column per shift (days * shifts columns), the same layout as
+    a worker's calendar slice of the representation.
+
+    An instance can be saved as a folder of .npy arrays with save, and opened with ProblemInstance.load, which
+    memory maps the arrays: the processes of a grid-search or of the islands then share the pages of one copy.
+    """
+
+    def __init__(self, days, shifts, workers, workers_per_shift, holidays, skilled_shifts, skills, preferences):
+        # Keeping the data as given by the data sheets.
+        self.days = days
+        self.shifts = shifts
+        self.workers = workers
+        self.workers_per_shift = workers_per_shift
+        self.holidays = holidays
+        self.skilled_shifts = skilled_shifts
+        self.skills = skills
+        self.preferences = preferences
+
+        self.set_sizes()
+
+        # Dense versions of the holidays, preferences and number of workers needed per shift.
+        self.holidays_matrix = np.array([holidays[i] for i in range(workers)])
+        self.preferences_matrix = np.array([preferences[i] for i in range(workers)])
+        self.coverage = np.array(workers_per_shift)
+
+        # Marking the shifts each worker can take, a worker can't take a skilled shift if they miss at least
+        # one of the required skills.
+        self.skill_eligibility = np.ones((workers, self.total_shifts), dtype=bool)
+        for i in range(workers):
+            for shift, required_skills in skilled_shifts.items():
+                self.skill_eligibility[i, shift] = all(skill in skills[i] for skill in required_skills)
+
+    def set_sizes(self):
+        """Sets the sizes and the 2-day spans, which only depend on the days, shifts and workers."""
+        self.total_shifts = self.days * self.shifts
+        self.genome_length = self.total_shifts * self.workers
+
+        # The 2-day spans are the blocks [2 * j * shifts, 2 * (j + 1) * shifts) of the calendar that start
+        # inside it. two_day_window gives the span of each shift.
+        self.two_day_starts = np.arange(0, self.total_shifts, 2 * self.shifts)
+        self.two_day_window = np.arange(self.total_shifts) // (2 * self.shifts)
+
+    @classmethod
+    def from_module(cls, module):
+        """Builds the instance from a data sheet such as data_easy.
+
+        Args:
+            module (module): Module defining days, shifts, workers, workers_per_shift, holidays,
+                skilled_shifts, skills and preferences.
+
+        Returns:
+            ProblemInstance: The instance.
+        """
+        return cls(module.days, module.shifts, module.workers, module.workers_per_shift, module.holidays,
+                   module.skilled_shifts, module.skills, module.preferences)
+
+    @classmethod
+    def from_arrays(cls, days, shifts, coverage, holidays, preferences, skill_names, skills, required_skills,
+                    skill_eligibility=None):
+        """Builds the instance from its matrices, without copying them.
+
+        The data sheet attributes (holidays, preferences, skills and skilled_shifts) are rebuilt as dicts, the
+        holidays and preferences of each worker being rows of the matrices.
+
+        Args:
+            days (int): Number of days.
+            shifts (int): Number of shifts per day.
+            coverage (np.ndarray): Number of workers needed per shift, shaped (days * shifts,).
+            holidays (np.ndarray): 1 where a worker is on holidays, shaped (workers, days * shifts).
+            preferences (np.ndarray): 1, 0 or -1 for each worker and shift, shaped (workers, days * shifts).
+            skill_names (list): Name of each skill.
+            skills (np.ndarray): True where a worker has a skill, shaped (workers, skills).
+            required_skills (np.ndarray): True where a shift requires a skill, shaped (days * shifts, skills).
+            skill_eligibility (np.ndarray): True where a worker has all the skills of a shift, computed from
+                skills and required_skills when not given.
+
+        Returns:
+            ProblemInstance: The instance.
+        """
+        instance = cls.__new__(cls)
+        instance.days, instance.shifts, instance.workers = days, shifts, len(holidays)
+        instance.workers_per_shift = coverage
+        instance.holidays = {i: holidays[i] for i in range(instance.workers)}
+        instance.preferences = {i: preferences[i] for i in range(instance.workers)}
+        instance.skills = {i: [skill_names[k] for k in np.flatnonzero(skills[i])] for i in range(instance.workers)}
+        instance.skilled_shifts = {int(shift): [skill_names[k] for k in np.flatnonzero(required_skills[shift])]
+                                   for shift in np.flatnonzero(required_skills.any(axis=1))}
+
+        instance.holidays_matrix = holidays
+        instance.preferences_matrix = preferences
+        instance.coverage = coverage
+        if skill_eligibility is None:
+            # A worker can take a shift when no skill is required by the shift and missing for the worker.
+            skill_eligibility = ~(required_skills[np.newaxis, :, :] & ~skills[:, np.newaxis, :]).any(axis=2)
+        instance.skill_eligibility = skill_eligibility
+        instance.set_sizes()
+        return instance
+
+    def skill_matrices(self):
+        """The skills as matrices, for from_arrays.
+
+        Returns:
+            tuple: The sorted skill names, the (workers, skills) matrix of the skills of each worker and the
+            (days * shifts, skills) matrix of the skills required by each shift.
+        """
+        skill_names = sorted({skill for i in range(self.workers) for skill in self.skills[i]}
+                             | {skill for required in self.skilled_shifts.values() for skill in required})
+        index = {skill: k for k, skill in enumerate(skill_names)}
+        skills = np.zeros((self.workers, len(skill_names)), dtype=bool)
+        for i in range(self.workers):
+            skills[i, [index[skill] for skill in self.skills[i]]] = True
+        required_skills = np.zeros((self.total_shifts, len(skill_names)), dtype=bool)
+        for shift, required in self.skilled_shifts.items():
+            required_skills[shift, [index[skill] for skill in required]] = True
+        return skill_names, skills, required_skills
+
+    def save(self, path):
+        """Saves the instance as a folder of .npy arrays, plus an instance.json file with the sizes and skills.
+
+        Args:
+            path (Path): Folder to write, created if needed.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        skill_names, skills, required_skills = self.skill_matrices()
+        arrays = {"coverage": np.asarray(self.coverage, dtype=np.int32),
+                  "holidays": np.asarray(self.holidays_matrix, dtype=np.int8),
+                  "preferences": np.asarray(self.preferences_matrix, dtype=np.int8),
+                  "skills": skills, "required_skills": required_skills,
+                  "skill_eligibility": np.asarray(self.skill_eligibility, dtype=bool)}
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", array)
+        (path / "instance.json").write_text(json.dumps(
+            {"days": self.days, "shifts": self.shifts, "workers": self.workers, "skill_names": skill_names},
+            indent=2))
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Opens an instance saved with save.
+
+        Args:
+            path (Path): Folder written by save.
+            mmap_mode (str): Memory mapping mode of the arrays, "r" maps them read-only and None reads them.
+
+        Returns:
+            ProblemInstance: The instance.
+        """
+        path = Path(path)
+        if not (path / "instance.json").is_file():
+            raise Exception(f"{path} is not a saved instance, it has no instance.json file.")
+        sizes = json.loads((path / "instance.json").read_text())
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in ["coverage", "holidays", "preferences", "skills", "required_skills",
+                               "skill_eligibility"]}
+        if arrays["holidays"].shape != (sizes["workers"], sizes["days"] * sizes["shifts"]):
+            raise Exception(f"The arrays of {path} don't match the sizes of its instance.json file.")
+        return cls.from_arrays(sizes["days"], sizes["shifts"], arrays["coverage"], arrays["holidays"],
+                               arrays["preferences"], sizes["skill_names"], arrays["skills"],
+                               arrays["required_skills"], arrays["skill_eligibility"])
+
+    def __repr__(self):
+        return f'ProblemInstance(days={self.days}, shifts={self.shifts}, workers={self.workers})'
+
+
+@lru_cache(maxsize=None)
+def load_instance(name):
+    """Loads one of the difficulty levels, or an instance saved with ProblemInstance.save, building it only once
+    per process.
+
+    Args:
+        name (str): "easy", "medium_hard" or the folder of a saved instance, such as the ones written by
+            instance_generator.py.
+
+    Returns:
+        ProblemInstance: The instance.
+    """
+    if name not in instance_modules:
+        if Path(name, "instance.json").is_file():
+            return ProblemInstance.load(name)
+        raise Exception(f"Unknown instance {name}, choose one of {list(instance_modules)} or a saved instance.")
+    return ProblemInstance.from_module(import_module(instance_modules[name]))
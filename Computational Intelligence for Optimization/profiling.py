@@ -0,0 +1,94 @@
+from time import perf_counter
+from pathlib import Path
+import tracemalloc
+import csv
+
+# The phases of a generation timed by Population.evolve when profiling.
+phases = ["selection", "crossover", "mutation", "evaluation", "local_search", "elitism", "report", "store",
+          "checkpoint"]
+
+
+class EvolveStats:
+    """Wall time and number of calls of each phase of Population.evolve, in total and for each generation.
+
+    The operators and steps of evolve are wrapped with timed only when profiling, so a population evolved
+    without profiling runs exactly the same code as before.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.seconds = {phase: 0.0 for phase in phases}
+        self.calls = {phase: 0 for phase in phases}
+        # One row per generation: the generation, its wall time, the seconds of each phase and the peak memory.
+        self.generations = []
+        self.generation_start = None
+        self.generation_seconds = dict(self.seconds)
+        self.started_tracing = False
+
+    def timed(self, phase, function):
+        """Wraps a function so the time of each call is added to the phase."""
+        seconds, calls = self.seconds, self.calls
+
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            seconds[phase] += perf_counter() - start
+            calls[phase] += 1
+            return result
+
+        return timed_function
+
+    def start(self):
+        """Called when evolve starts, it starts tracing the memory allocations if needed."""
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.generation_start = perf_counter()
+
+    def end_generation(self, gen):
+        """Records the time of each phase during the generation that just finished."""
+        now = perf_counter()
+        row = {"gen": gen, "seconds": now - self.generation_start}
+        for phase in phases:
+            row[phase] = self.seconds[phase] - self.generation_seconds[phase]
+        self.generation_seconds = dict(self.seconds)
+        if self.track_memory:
+            row["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.generations.append(row)
+        self.generation_start = now
+
+    def stop(self):
+        """Called when evolve finishes, it stops tracing the memory allocations if it started it."""
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def summary(self):
+        """Returns the total seconds, calls and share of the time of each phase."""
+        total = sum(row["seconds"] for row in self.generations)
+        return {phase: {"seconds": self.seconds[phase], "calls": self.calls[phase],
+                         "share": self.seconds[phase] / total if total else 0.0} for phase in phases}
+
+    def write_csv(self, path, fitnesses=None):
+        """Writes one row per generation, with the best fitness of the generation when fitnesses is given.
+
+        Args:
+            path (Path): csv file to write.
+            fitnesses (list): Best fitness of each generation, such as Population.fitnesses.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        columns = ["gen", "seconds"] + phases + (["peak_memory"] if self.track_memory else [])
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns + (["fitness"] if fitnesses is not None else []))
+            for row in self.generations:
+                values = [row[column] for column in columns]
+                if fitnesses is not None:
+                    values.append(fitnesses[row["gen"] - 1] if row["gen"] <= len(fitnesses) else "")
+                writer.writerow(values)
+
+    def __repr__(self):
+        return "EvolveStats(" + ", ".join(f"{phase}={self.seconds[phase]:.3f}s/{self.calls[phase]}"
+                                          for phase in phases) + ")"
@@ -0,0 +1,135 @@
+from grid_search import expand_grid, load_finished, run_jobs
+from statistics import NormalDist
+import numpy as np
+
+
+def block_ranks(scores, optim):
+    """Ranks the configurations inside each run, the best one gets rank 1 and ties get their average rank.
+
+    Args:
+        scores (np.ndarray): Final fitness shaped (runs, configurations). Run i of every configuration uses the
+            same seed, so each row is a block of the Friedman test.
+        optim (str): "max" or "min".
+
+    Returns:
+        np.ndarray: The ranks, with the same shape as scores.
+    """
+    if optim == "max":
+        scores = -scores
+    elif optim != "min":
+        raise Exception("No optimization specified (min or max).")
+
+    ranks = np.empty(scores.shape)
+    for block, row in enumerate(scores):
+        order = np.argsort(row, kind="stable")
+        sorted_row = row[order]
+        start = 0
+        # Giving each group of tied scores the average of the ranks it spans.
+        while start < len(row):
+            end = start + 1
+            while end < len(row) and sorted_row[end] == sorted_row[start]:
+                end += 1
+            ranks[block, order[start:end]] = (start + end + 1) / 2
+            start = end
+    return ranks
+
+
+def friedman_test(ranks):
+    """Friedman test of the hypothesis that every configuration performs the same.
+
+    The p-value of the chi-squared statistic uses the Wilson-Hilferty approximation, so no statistics package
+    is needed.
+
+    Args:
+        ranks (np.ndarray): Ranks shaped (runs, configurations), see block_ranks.
+
+    Returns:
+        float: The p-value.
+    """
+    runs, configurations = ranks.shape
+    mean_ranks = ranks.mean(axis=0)
+    statistic = 12 * runs / (configurations * (configurations + 1)) * \
+        ((mean_ranks - (configurations + 1) / 2) ** 2).sum()
+
+    # A chi-squared with k degrees of freedom is close to a normal once its cube root is taken.
+    k = configurations - 1
+    z = ((statistic / k) ** (1 / 3) - (1 - 2 / (9 * k))) / (2 / (9 * k)) ** 0.5
+    return 1 - NormalDist().cdf(z)
+
+
+def critical_difference(configurations, runs, confidence):
+    """Largest difference of mean ranks between a configuration and the best one that isn't significant.
+
+    When two configurations perform the same, the difference of their mean ranks has a variance of k(k + 1) / (6n)
+    for k configurations ranked over n runs.
+
+    Args:
+        configurations (int): Number of configurations ranked.
+        runs (int): Number of runs (blocks).
+        confidence (float): Confidence level.
+
+    Returns:
+        float: The critical difference.
+    """
+    return NormalDist().inv_cdf(confidence) * (configurations * (configurations + 1) / (6 * runs)) ** 0.5
+
+
+def race(configurations, journal, min_runs=5, max_runs=35, batch=5, confidence=0.95, seed=0, processes=None):
+    """Finds the best configuration with an F-race, dropping the configurations that are clearly worse early.
+
+    Every surviving configuration is run batch more times each round, run i always using the same seed like
+    the grid-search. Once the configurations have min_runs runs, the Friedman test is applied to the final fitness
+    of the runs after every round. When it rejects that every configuration performs the same, the
+    configurations whose mean rank is worse than the best one by more than the critical difference are dropped.
+    The race stops when a single configuration is left or the survivors have max_runs runs.
+
+    Args:
+        configurations (dict): Settings of each configuration, keyed by its name (see grid_search.expand_grid).
+            They must all have the same "optim".
+        journal (Path): csv file where the finished jobs are recorded, the race resumes from it like the
+            grid-search.
+        min_runs (int): Number of runs of each configuration before any of them is dropped.
+        max_runs (int): Number of runs of each configuration in the exhaustive grid-search.
+        batch (int): Number of runs added to each surviving configuration every round.
+        confidence (float): Confidence level of the tests.
+        seed (int): Seed of the experiment, see grid_search.expand_grid.
+        processes (int): Number of worker processes, all the cores by default.
+
+    Returns:
+        tuple: The name of the best configuration, the mean final fitness of the survivors, the number of runs
+            of each configuration, and the fitness per generation of each run, keyed by (name, run).
+    """
+    optim = {configuration["optim"] for configuration in configurations.values()}
+    if len(optim) != 1:
+        raise Exception("Every configuration of the race must have the same optimization (min or max).")
+    optim = optim.pop()
+
+    journaled = load_finished(journal)
+    finished = {}
+    survivors = list(configurations)
+    runs = {name: 0 for name in configurations}
+    done = 0
+
+    while True:
+        done = min(max(done + batch, min_runs), max_runs)
+        finished.update(run_jobs(expand_grid({name: configurations[name] for name in survivors}, done, seed),
+                                 journal, journaled, processes))
+        for name in survivors:
+            runs[name] = done
+
+        if len(survivors) == 1 or done == max_runs:
+            break
+
+        scores = np.array([[finished[(name, run)][-1] for name in survivors] for run in range(done)],
+                          dtype=np.float64)
+        ranks = block_ranks(scores, optim)
+        if friedman_test(ranks) < 1 - confidence:
+            # Comparing every configuration with the best one.
+            mean_ranks = ranks.mean(axis=0)
+            difference = critical_difference(len(survivors), done, confidence)
+            survivors = [name for name, mean_rank in zip(survivors, mean_ranks)
+                         if mean_rank - mean_ranks.min() <= difference]
+
+    means = {name: float(np.mean([finished[(name, run)][-1] for run in range(runs[name])])) for name in survivors}
+    best = max(means, key=means.get) if optim == "max" else min(means, key=means.get)
+    return best, means, runs, finished
@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+# Structured record of a generation, passed to the reporter of Population.evolve. The individual is the best
+# one of the generation (the one with the highest fitness when maximizing and the lowest when minimizing).
+GenerationRecord = namedtuple("GenerationRecord", ["gen", "optim", "individual", "fitness"])
+
+
+def summary_reporter(record):
+    """Prints a single line with the generation and its best fitness.
+
+    Args:
+        record (GenerationRecord): The generation to report.
+    """
+    print(f'Generation {record.gen}: Fitness {record.fitness[0]}')
+
+
+def full_reporter(record):
+    """Prints the best individual of the generation and every component of its fitness.
+
+    Args:
+        record (GenerationRecord): The generation to report.
+    """
+    label = "Best" if record.optim == "max" else "Worst"
+    print(f'------------------- Generation {record.gen} -------------------\n'
+          f'{label} Individual: {record.individual}\n'
+          f'Fitness: {record.fitness[0]}\n'
+          f'Distributed Workers: {record.fitness[1]}\n'
+          f'Consecutive Shifts: {record.fitness[2]}\n'
+          f'Shifts in 2 Days: {record.fitness[3]}\n'
+          f'Shifts Not Completely Filled: {record.fitness[4]}\n'
+          f'Holidays Not Respected: {record.fitness[5]}\n'
+          f'Number of Failed Skilled Shifts: {record.fitness[6]}\n'
+          f'Number of Preferences Respected: {record.fitness[7]}\n'
+          f'Number of Preferences Not Respected: {record.fitness[8]}\n')
+
+
+# The verbosity levels accepted by Population.evolve. In silent mode no record is built at all.
+reporters = {"silent": None, "summary": summary_reporter, "full": full_reporter}
+
+
+def get_reporter(report):
+    """Finds the reporter for a verbosity level.
+
+    Args:
+        report (str or callable): "silent", "summary", "full" or a function receiving a GenerationRecord.
+
+    Returns:
+        callable: The reporter, or None when silent.
+    """
+    if callable(report):
+        return report
+    if report not in reporters:
+        raise Exception(f"Unknown report level {report}, choose one of {list(reporters)}.")
+    return reporters[report]
@@ -0,0 +1,73 @@
+from pathlib import Path
+import struct
+import numpy as np
+
+# Each run is stored as a record made of a header, with the first generation and the number of generations,
+# followed by the fitness of each generation as float64.
+run_header = struct.Struct("<II")
+
+
+class ResultsWriter:
+    """Append-only writer of the fitness of each generation of each run.
+
+    The values of a run are kept in memory and written in a single binary record when the run is flushed,
+    instead of re-opening the file every generation. Flushing again after more generations of the same run
+    rewrites its record in place, so a run evolved over several calls is stored as one run. When something was
+    written after the record in the meantime, for example by another writer of the same file, the run is written
+    in a new record at the end of the file instead.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.first_gen = None
+        self.buffer = []
+        # Position and size in bytes of the record of the current run in the file, once it was flushed.
+        self.offset = None
+        self.length = None
+
+    def record(self, gen, fitness):
+        if self.first_gen is None:
+            self.first_gen = gen
+        self.buffer.append(fitness)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.is_file() else 0
+        # Replacing the record of the run written by the previous flush only when it is still the last one.
+        if self.offset is None or size != self.offset + self.length:
+            self.offset = size
+        record = run_header.pack(self.first_gen, len(self.buffer)) + \
+            np.asarray(self.buffer, dtype=np.float64).tobytes()
+        with open(self.path, "r+b" if self.path.is_file() else "wb") as file:
+            file.seek(self.offset)
+            file.truncate()
+            file.write(record)
+        self.length = len(record)
+
+
+def load_runs(path):
+    """Rebuilds the generation x run matrix of a results file.
+
+    Args:
+        path (Path): File written by ResultsWriter.
+
+    Returns:
+        np.ndarray: Array shaped (generations, runs) with the fitness of each generation in each run. The
+            generations a run doesn't cover are NaN.
+    """
+    data = Path(path).read_bytes()
+    runs = []
+    offset = 0
+    while offset < len(data):
+        first_gen, count = run_header.unpack_from(data, offset)
+        offset += run_header.size
+        runs.append((first_gen, np.frombuffer(data, dtype=np.float64, count=count, offset=offset)))
+        offset += count * 8
+
+    last_gen = max((first_gen + len(values) - 1 for first_gen, values in runs), default=0)
+    matrix = np.full((last_gen, len(runs)), np.nan)
+    for run, (first_gen, values) in enumerate(runs):
+        matrix[first_gen - 1:first_gen - 1 + len(values), run] = values
+    return matrix
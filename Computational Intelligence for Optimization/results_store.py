@@ -0,0 +1,395 @@
+from racing import block_ranks, friedman_test, critical_difference
+from charles import derive_seeds
+from crossover import crossover_methods
+from mutation import mutation_methods
+from selection import selection_methods
+from functools import lru_cache
+from pathlib import Path
+from math import atan, cos, sin, sqrt, pi
+import argparse
+import sqlite3
+import zipfile
+import json
+import csv
+import io
+import numpy as np
+
+# The store is a single SQLite file with three tables:
+# - configurations: one row per experiment and settings, with the settings used in queries as indexed columns
+# - runs: one row per run of a configuration, with its seed and final fitness, so the rank tests never read the
+#   curves
+# - fitness: one row per generation of each run, clustered by run and generation
+schema = """
+CREATE TABLE IF NOT EXISTS configurations (
+    id INTEGER PRIMARY KEY,
+    experiment TEXT NOT NULL,
+    name TEXT NOT NULL,
+    instance TEXT,
+    encoding TEXT,
+    selection TEXT,
+    mutation TEXT,
+    crossover TEXT,
+    mut_prob REAL,
+    xo_prob REAL,
+    elitism INTEGER,
+    size INTEGER,
+    gens INTEGER,
+    settings TEXT NOT NULL,
+    UNIQUE (experiment, settings)
+);
+CREATE INDEX IF NOT EXISTS configurations_keys
+    ON configurations (instance, selection, mutation, crossover, mut_prob, xo_prob);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    configuration INTEGER NOT NULL REFERENCES configurations (id),
+    run INTEGER NOT NULL,
+    seed TEXT,
+    generations INTEGER NOT NULL,
+    final REAL,
+    UNIQUE (configuration, run)
+);
+CREATE TABLE IF NOT EXISTS fitness (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    gen INTEGER NOT NULL,
+    fitness REAL NOT NULL,
+    PRIMARY KEY (run, gen)
+) WITHOUT ROWID;
+"""
+
+# The columns of the configurations that can filter the queries, with the configuration key each one comes from.
+key_columns = {"experiment": None, "name": None, "instance": "instance", "encoding": "encoding",
+               "selection": "select", "mutation": "mutate", "crossover": "crossover", "mut_prob": "mut_prob",
+               "xo_prob": "xo_prob", "elitism": "elitism", "size": "size", "gens": "gens"}
+
+
+class Median:
+    """SQLite aggregate for the median. SQLite finalizes each group before starting the next one, so only the
+    values of one generation are in memory at a time."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return float(np.median(self.values)) if self.values else None
+
+
+def t_central(t, degrees):
+    """Probability that a Student t variable with integer degrees of freedom is between -t and t.
+
+    It is the finite series in the angle atan(t / sqrt(degrees)) of Abramowitz and Stegun (26.7.3 and 26.7.4).
+    """
+    theta = atan(t / sqrt(degrees))
+    squared_cosine = cos(theta) ** 2
+    term = total = 1.0
+    if degrees % 2:
+        for k in range(1, (degrees - 1) // 2):
+            term *= 2 * k / (2 * k + 1) * squared_cosine
+            total += term
+        return 2 / pi * (theta + (sin(theta) * cos(theta) * total if degrees > 1 else 0.0))
+    for k in range(1, degrees // 2):
+        term *= (2 * k - 1) / (2 * k) * squared_cosine
+        total += term
+    return sin(theta) * total
+
+
+@lru_cache(maxsize=None)
+def t_quantile(p, degrees):
+    """Quantile of the Student t distribution, for p above 0.5 and integer degrees of freedom.
+
+    The exact distribution function (see t_central) is solved by bisection, so no statistics package is needed.
+    """
+    target = 2 * p - 1
+    low, high = 0.0, 1.0
+    while t_central(high, degrees) < target:
+        low, high = high, 2 * high
+    while high - low > 1e-12 * high:
+        middle = (low + high) / 2
+        if t_central(middle, degrees) < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class ResultsStore:
+    """Results of every run of every experiment, in a single SQLite file.
+
+    A configuration is identified by its experiment and its settings, as given to grid_search.run_grid_search,
+    and each of its runs by its number. The queries filter the configurations on the columns of key_columns,
+    for example store.curves(instance="easy", selection="rank"), with a value or a list of values, and aggregate
+    inside SQLite, so the runs are never all loaded in memory.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        # With the write-ahead log, the store can be queried while a grid-search is adding runs to it.
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(schema)
+        self.connection.create_aggregate("median", 1, Median)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def configuration_id(self, experiment, name, configuration):
+        """Finds the id of a configuration, adding it when it is new.
+
+        Args:
+            experiment (str): Name of the experiment, such as "first_grid_search".
+            name (str): Name of the configuration in the experiment.
+            configuration (dict): Settings of the configuration (see grid_search.expand_grid).
+
+        Returns:
+            int: The id.
+        """
+        settings = json.dumps(configuration, sort_keys=True)
+        row = self.connection.execute("SELECT id FROM configurations WHERE experiment = ? AND settings = ?",
+                                      (experiment, settings)).fetchone()
+        if row is not None:
+            return row[0]
+        keys = {column: configuration.get(key) for column, key in key_columns.items() if key is not None}
+        keys["encoding"] = keys["encoding"] or "binary"
+        keys["elitism"] = None if keys["elitism"] is None else int(keys["elitism"])
+        columns = ["experiment", "name", *keys, "settings"]
+        return self.connection.execute(
+            f'INSERT INTO configurations ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+            (experiment, name, *keys.values(), settings)).lastrowid
+
+    def add_run(self, experiment, name, configuration, run, fitnesses, seed=None):
+        """Adds a run, replacing the run of the configuration with the same number if there is one.
+
+        Args:
+            experiment (str): Name of the experiment.
+            name (str): Name of the configuration in the experiment.
+            configuration (dict): Settings of the configuration.
+            run (int): Number of the run.
+            fitnesses (list): Best fitness of each generation, the first one being generation 1.
+            seed (int): Seed of the run, None when unknown.
+        """
+        configuration = self.configuration_id(experiment, name, configuration)
+        cursor = self.connection.cursor()
+        row = cursor.execute("SELECT id FROM runs WHERE configuration = ? AND run = ?",
+                             (configuration, run)).fetchone()
+        if row is not None:
+            cursor.execute("DELETE FROM fitness WHERE run = ?", row)
+            cursor.execute("DELETE FROM runs WHERE id = ?", row)
+        # The seeds are unsigned 64 bit integers, which don't fit in an SQLite integer.
+        run_id = cursor.execute(
+            "INSERT INTO runs (configuration, run, seed, generations, final) VALUES (?, ?, ?, ?, ?)",
+            (configuration, run, None if seed is None else str(seed), len(fitnesses),
+             float(fitnesses[-1]) if len(fitnesses) else None)).lastrowid
+        cursor.executemany("INSERT INTO fitness (run, gen, fitness) VALUES (?, ?, ?)",
+                           ((run_id, gen, float(fitness)) for gen, fitness in enumerate(fitnesses, start=1)))
+
+    def add_grid_search(self, experiment, configurations, finished, runs, seed=0):
+        """Adds the runs of a grid-search, with their seeds, replacing the runs with the same numbers.
+
+        Args:
+            experiment (str): Name of the experiment, such as "first_grid_search".
+            configurations (dict): Settings of each configuration, keyed by its name (see grid_search.expand_grid).
+            finished (dict): Fitness of each generation of each run, keyed by (name, run), as returned by
+                grid_search.run_grid_search.
+            runs (int): Number of runs of each configuration.
+            seed (int): Seed of the experiment, see grid_search.expand_grid.
+        """
+        seeds = derive_seeds(seed, runs)
+        for name, configuration in configurations.items():
+            for run in range(runs):
+                self.add_run(experiment, name, configuration, run, finished[(name, run)], seeds[run])
+        self.commit()
+
+    def where(self, filters):
+        """Builds the WHERE clause of the configurations matching the filters."""
+        conditions, parameters = [], []
+        for column, value in filters.items():
+            if column not in key_columns:
+                raise Exception(f"Unknown filter {column}, choose among {list(key_columns)}.")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            conditions.append(f'c.{column} IN ({", ".join("?" * len(values))})')
+            parameters.extend(int(item) if isinstance(item, bool) else item for item in values)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+    def configurations(self, **filters):
+        """Lists the configurations matching the filters, with their number of runs.
+
+        Returns:
+            list: One dict per configuration, with its key columns, its settings and its runs.
+        """
+        where, parameters = self.where(filters)
+        cursor = self.connection.execute(
+            f"SELECT c.*, (SELECT COUNT(*) FROM runs r WHERE r.configuration = c.id) AS runs "
+            f"FROM configurations c{where} ORDER BY c.id", parameters)
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor]
+        for row in rows:
+            row["settings"] = json.loads(row["settings"])
+        return rows
+
+    def labels(self, filters):
+        """Maps the ids of the configurations matching the filters to their names, which must be unique."""
+        labels = {row["id"]: row["name"] for row in self.configurations(**filters)}
+        if len(set(labels.values())) != len(labels):
+            raise Exception("Several configurations have the same name, filter them by experiment or instance.")
+        return labels
+
+    def curves(self, confidence=0.95, median=False, **filters):
+        """Aggregates the fitness of each generation over the runs of each configuration.
+
+        Args:
+            confidence (float): Confidence level of the intervals of the mean.
+            median (bool): Also computes the median of each generation, which is slower than the other
+                aggregates as its values go through Python.
+            **filters: Values of the key columns of the configurations to aggregate.
+
+        Returns:
+            dict: Per configuration name, an array with one row per generation and the columns generation,
+                runs, mean, lower and upper bounds of the confidence interval of the mean, and median when
+                asked for.
+        """
+        labels = self.labels(filters)
+        where, parameters = self.where(filters)
+        aggregates = "COUNT(*), AVG(f.fitness), SUM(f.fitness * f.fitness)" + (", median(f.fitness)" if median else "")
+        cursor = self.connection.execute(
+            f"SELECT c.id, f.gen, {aggregates} FROM fitness f JOIN runs r ON r.id = f.run "
+            f"JOIN configurations c ON c.id = r.configuration{where} GROUP BY c.id, f.gen ORDER BY c.id, f.gen",
+            parameters)
+
+        rows = {}
+        for configuration, gen, runs, mean, squares, *rest in cursor:
+            # The sample variance from the sum of squares, the fitnesses being small enough for float64.
+            variance = max(squares - runs * mean * mean, 0) / (runs - 1) if runs > 1 else 0.0
+            margin = t_quantile((1 + confidence) / 2, runs - 1) * (variance / runs) ** 0.5 if runs > 1 else 0.0
+            rows.setdefault(configuration, []).append([gen, runs, mean, mean - margin, mean + margin, *rest])
+        return {labels[configuration]: np.array(values, dtype=np.float64) for configuration, values in rows.items()}
+
+    def final_fitness(self, **filters):
+        """Reads the final fitness of the runs of the configurations, matched by run number.
+
+        Only the run numbers every configuration has are kept, so each row is a block of the rank tests (run i
+        of every configuration of a grid-search has the same seed).
+
+        Returns:
+            tuple: The configuration names and the final fitness shaped (runs, configurations).
+        """
+        labels = self.labels(filters)
+        where, parameters = self.where(filters)
+        cursor = self.connection.execute(
+            f"SELECT c.id, r.run, r.final FROM runs r JOIN configurations c ON c.id = r.configuration{where}",
+            parameters)
+        finals = {}
+        for configuration, run, final in cursor:
+            finals.setdefault(run, {})[configuration] = final
+        runs = sorted(run for run, values in finals.items() if len(values) == len(labels))
+        return list(labels.values()), np.array([[finals[run][configuration] for configuration in labels]
+                                                for run in runs], dtype=np.float64).reshape(len(runs), len(labels))
+
+    def rank_test(self, optim="max", confidence=0.95, **filters):
+        """Compares the final fitness of the configurations with the Friedman test, like the F-race.
+
+        Args:
+            optim (str): "max" or "min".
+            confidence (float): Confidence level of the test.
+            **filters: Values of the key columns of the configurations to compare.
+
+        Returns:
+            dict: The p-value of the Friedman test, the number of runs compared, the mean rank of each
+                configuration, the critical difference of the mean ranks and the configurations whose mean rank
+                is within it of the best one (all of them when the test doesn't reject).
+        """
+        names, scores = self.final_fitness(**filters)
+        if len(names) < 2 or len(scores) < 2:
+            raise Exception("The rank test needs at least 2 configurations with at least 2 common runs.")
+        ranks = block_ranks(scores, optim)
+        mean_ranks = ranks.mean(axis=0)
+        p_value = friedman_test(ranks)
+        difference = critical_difference(len(names), len(scores), confidence)
+        best = [name for name, mean_rank in zip(names, mean_ranks)
+                if p_value >= 1 - confidence or mean_rank - mean_ranks.min() <= difference]
+        return {"p_value": p_value, "runs": len(scores), "mean_ranks": dict(zip(names, mean_ranks.tolist())),
+                "critical_difference": difference, "best": best}
+
+
+def legacy_configuration(folder, stem):
+    """Rebuilds the configuration of a csv results file of the archived grid-searches from its name.
+
+    Args:
+        folder (str): Archive folder, such as "easy_first_grid_search" or "hard_parameter_tuning".
+        stem (str): File name without the extension, such as "uniform_crossover_swap_mutation_rank".
+
+    Returns:
+        tuple: The name of the configuration, as given by the grid-search files, and its settings.
+    """
+    configuration = {"instance": "easy" if folder.startswith("easy") else "medium_hard", "size": 100,
+                     "optim": "max", "gens": 100, "elitism": True}
+    if folder.endswith("first_grid_search"):
+        # The files are named crossover_mutation_selection, and the operator names have underscores too.
+        crossover = next(name for name in crossover_methods if stem.startswith(name + "_"))
+        selection = next(name for name in selection_methods if stem.endswith("_" + name))
+        mutation = stem[len(crossover) + 1:-len(selection) - 1]
+        if mutation not in mutation_methods:
+            raise Exception(f"Unknown mutation {mutation} in {stem}.")
+        configuration.update(select=selection, mutate=mutation, crossover=crossover, mut_prob=0.15, xo_prob=0.85)
+        return f"{selection} / {mutation} / {crossover}", configuration
+    elif folder.endswith("parameter_tuning"):
+        # The files are named crossover probability_mutation probability_mutation.
+        cross_value, mutation_value, mutation = stem.split("_", 2)
+        configuration.update(select="rank", mutate=mutation, crossover="uniform_crossover",
+                             mut_prob=float(mutation_value), xo_prob=float(cross_value))
+        return f"{cross_value} / {mutation_value} / {mutation}", configuration
+    raise Exception(f"Unknown archive folder {folder}.")
+
+
+def import_archive(store, path):
+    """Imports the csv results files of one of the archived grid-searches, such as easy_first_grid_search.zip.
+
+    Each file has one row per generation, with the generation and the fitness of each run. The runs go to the
+    "legacy_first_grid_search" or "legacy_parameter_tuning" experiment, without seeds.
+
+    Args:
+        store (ResultsStore): The store.
+        path (Path): The zip archive.
+
+    Returns:
+        int: Number of runs imported.
+    """
+    imported = 0
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            parts = Path(member).parts
+            if parts[0] == "__MACOSX" or not member.endswith(".csv"):
+                continue
+            name, configuration = legacy_configuration(parts[0], Path(member).stem)
+            experiment = "legacy_" + parts[0].split("_", 1)[1]
+            rows = list(csv.reader(io.TextIOWrapper(archive.open(member), encoding="utf-8")))
+            # Turning the generation rows into the curve of each run.
+            for run, fitnesses in enumerate(zip(*(row[1:] for row in rows if row))):
+                store.add_run(experiment, name, configuration, run, [float(value) for value in fitnesses])
+                imported += 1
+    store.commit()
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imports the archived grid-search results into a results store.")
+    parser.add_argument("archives", type=Path, nargs="+", help="zip archives, such as easy_first_grid_search.zip")
+    parser.add_argument("--store", type=Path, default=Path("results.sqlite"))
+    arguments = parser.parse_args()
+
+    with ResultsStore(arguments.store) as results_store:
+        for archive_path in arguments.archives:
+            print(f"{archive_path}: {import_archive(results_store, archive_path)} runs")
@@ -0,0 +1,142 @@
+from charles import Population
+from scheduling_problem import use_instance, encodings
+from problem_instance import load_instance, instance_modules
+from selection import selection_methods
+from mutation import mutation_methods
+from crossover import crossover_methods
+from reporters import reporters
+from local_search import local_search_methods
+from neighbourhoods import neighbourhood_methods
+from functools import partial
+from array_engine import ArrayPopulation
+from islands import IslandModel, topologies
+from pathlib import Path
+import argparse
+
+
+def parse_arguments(arguments=None):
+    """Reads the instance and the algorithm settings from the command line.
+
+    The defaults are the best algorithm found in the "Statistical Analysis.ipynb".
+    """
+    parser = argparse.ArgumentParser(description="Solves the shift-scheduling problem with a genetic algorithm.")
+    parser.add_argument("--instance", default="medium_hard",
+                        help=f"one of {list(instance_modules)} or the folder of an instance saved by "
+                             f"instance_generator.py")
+    parser.add_argument("--encoding", default="binary", choices=list(encodings),
+                        help="coverage keeps the number of workers of every shift, use it with the column operators")
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--gens", type=int, default=200)
+    parser.add_argument("--select", default="rank", choices=list(selection_methods))
+    parser.add_argument("--mutate", default="swap_mutation", choices=list(mutation_methods))
+    parser.add_argument("--crossover", default="uniform_crossover", choices=list(crossover_methods))
+    parser.add_argument("--mut-prob", type=float, default=1.00)
+    parser.add_argument("--xo-prob", type=float, default=1.00)
+    parser.add_argument("--elites", type=int, default=1,
+                        help="number of elites kept each generation, 0 disables elitism (at most 1 with "
+                             "--engine array)")
+    parser.add_argument("--generation-gap", type=float, default=1.0,
+                        help="share of the population replaced each generation (individual engine only)")
+    parser.add_argument("--stagnation", type=int, default=None,
+                        help="stops after this number of generations without improvement")
+    parser.add_argument("--target", type=int, default=None, help="stops once this fitness is reached")
+    parser.add_argument("--max-evaluations", type=int, default=None)
+    parser.add_argument("--time-limit", type=float, default=None, help="wall-clock budget in seconds")
+    parser.add_argument("--local-search", default=None, choices=list(local_search_methods),
+                        help="improves the best offspring of each generation with a local search")
+    parser.add_argument("--neighbourhood", default="shift_swap", choices=list(neighbourhood_methods))
+    parser.add_argument("--local-search-steps", type=int, default=50)
+    parser.add_argument("--local-search-top", type=int, default=1)
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="file where the population is saved, the run resumes from it if it exists")
+    parser.add_argument("--checkpoint-interval", type=int, default=10)
+    parser.add_argument("--profile", type=Path, default=None,
+                        help="times each phase of evolve and writes one row per generation to this csv file")
+    parser.add_argument("--track-memory", action="store_true", help="also records the peak memory when profiling")
+    parser.add_argument("--report", default="full", choices=list(reporters))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--engine", default="individual", choices=["individual", "array"],
+                        help="array evolves the whole population as a single array with vectorized operators "
+                             "(binary encoding only)")
+    parser.add_argument("--islands", type=int, default=1,
+                        help="number of populations evolved in parallel processes, exchanging migrants")
+    parser.add_argument("--migration-interval", type=int, default=10)
+    parser.add_argument("--migrants", type=int, default=1)
+    parser.add_argument("--topology", default="ring", choices=list(topologies))
+    parsed = parser.parse_args(arguments)
+    # The array engine draws its genomes with the scheme of the binary encoding only.
+    if parsed.engine == "array" and parsed.encoding != "binary":
+        parser.error(f"--engine array only supports the binary encoding, not --encoding {parsed.encoding}")
+    # The options of Population.evolve beyond the genetic algorithm itself, which the islands don't pass on and the
+    # array engine doesn't have.
+    evolve_options = {"--generation-gap": parsed.generation_gap != 1.0, "--stagnation": parsed.stagnation is not None,
+                      "--target": parsed.target is not None, "--max-evaluations": parsed.max_evaluations is not None,
+                      "--time-limit": parsed.time_limit is not None, "--local-search": parsed.local_search is not None,
+                      "--checkpoint": parsed.checkpoint is not None, "--profile": parsed.profile is not None}
+    given = [option for option, used in evolve_options.items() if used]
+    if parsed.islands > 1 and parsed.engine == "array":
+        given.append("--engine array")
+    if parsed.islands > 1 and given:
+        parser.error(f"--islands only runs the genetic algorithm itself, not {', '.join(given)}")
+    if parsed.engine == "array" and given:
+        parser.error(f"--engine array only runs the genetic algorithm itself, not {', '.join(given)}")
+    if parsed.engine == "array" and parsed.elites > 1:
+        parser.error(f"--engine array keeps a single elite, not --elites {parsed.elites}")
+    return parsed
+
+
+def main(arguments=None):
+    arguments = parse_arguments(arguments)
+    instance = load_instance(arguments.instance)
+    use_instance(instance, arguments.encoding)
+
+    settings = dict(gens=arguments.gens, select=selection_methods[arguments.select],
+                    mutate=mutation_methods[arguments.mutate], crossover=crossover_methods[arguments.crossover],
+                    mut_prob=arguments.mut_prob, xo_prob=arguments.xo_prob, elitism=arguments.elites,
+                    report=arguments.report)
+
+    if arguments.islands > 1:
+        # Every island runs the same algorithm, from a different seed.
+        island = {"size": arguments.size, "select": arguments.select, "mutate": arguments.mutate,
+                  "crossover": arguments.crossover, "mut_prob": arguments.mut_prob, "xo_prob": arguments.xo_prob,
+                  "elitism": arguments.elites, "encoding": arguments.encoding}
+        pop = IslandModel([island] * arguments.islands, instance=arguments.instance, optim="max",
+                          migration_interval=arguments.migration_interval, migrants=arguments.migrants,
+                          topology=arguments.topology, seed=arguments.seed)
+        pop.evolve(gens=arguments.gens, report=arguments.report)
+    elif arguments.engine == "array":
+        pop = ArrayPopulation(size=arguments.size, optim="max", instance=instance, seed=arguments.seed)
+        pop.evolve(**settings)
+    else:
+        if arguments.checkpoint is not None and arguments.checkpoint.is_file():
+            # Resuming the run, with the random state it had when the checkpoint was saved.
+            pop = Population.restore(arguments.checkpoint)
+            settings["gens"] -= pop.gen - 1
+        else:
+            pop = Population(
+                size=arguments.size,
+                optim="max",
+                seed=arguments.seed)
+        local_search = None
+        if arguments.local_search is not None:
+            local_search = partial(local_search_methods[arguments.local_search],
+                                   neighbourhood=neighbourhood_methods[arguments.neighbourhood],
+                                   steps=arguments.local_search_steps)
+        pop.evolve(generation_gap=arguments.generation_gap, stagnation=arguments.stagnation,
+                   target=arguments.target, max_evaluations=arguments.max_evaluations,
+                   time_limit=arguments.time_limit, checkpoint=arguments.checkpoint,
+                   checkpoint_interval=arguments.checkpoint_interval, local_search=local_search,
+                   local_search_top=arguments.local_search_top, profile=arguments.profile is not None,
+                   track_memory=arguments.track_memory, **settings)
+        if arguments.report != "silent":
+            print(f'Stopped at generation {pop.stop_gen}: {pop.stop_reason}')
+        if arguments.profile is not None:
+            pop.stats.write_csv(arguments.profile, pop.fitnesses)
+            for phase, phase_stats in pop.stats.summary().items():
+                print(f'{phase:<14}{phase_stats["seconds"]:>10.3f}s{phase_stats["calls"]:>10} calls'
+                      f'{phase_stats["share"]:>8.1%}')
+    return pop
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,13 @@
-from charles import Population, Individual
-from random import choices
+from charles import Individual
 import random
-from copy import deepcopy
-from crossover import cycle_xo_binary_input, pmx_binary_input, single_point_co, uniform_crossover
-from mutation import swap_mutation, inversion_mutation, binary_mutation
-from selection import tournament_sel, fps, rank
 import numpy as np
 
-# It is here that we choose which difficulty we are going to tackle. We can only have one of them
-# turned on. If we want to tackle the private hospital setting we use data_easy sheet, and if we want
-# to tackle the public hospital setting we use the data_hard sheet.
 
-# from data_easy import days, shifts, workers, workers_per_shift, holidays, skilled_shifts, skills, preferences
-from data_medium_hard import days, shifts, workers, workers_per_shift, holidays, skilled_shifts, skills, preferences
+# Creating the function that will create our base representation, drawing from the given random generator.
+def get_representation(instance, rng=random):
+    days, shifts, workers = instance.days, instance.shifts, instance.workers
+    workers_per_shift = instance.workers_per_shift
 
-
-# Creating the function that will create our base representation.
-def get_representation(self):
     # Calculating the total number of indexes.
     total_indexes = days * shifts * workers
     # Representation placeholder.
@@ -36,7 +27,7 @@ def get_representation(self):
     # Iterating through all the workers.
     for worker in range(workers):
         # Choosing which are the shifts that this worker will work.
-        positions = random.sample(range(total_shifts * worker, total_shifts * (worker + 1)), perfect_shifts_per_worker)
+        positions = rng.sample(range(total_shifts * worker, total_shifts * (worker + 1)), perfect_shifts_per_worker)
 
         # Placing the bips on the representation.
         for pos in positions:
@@ -45,7 +36,7 @@ def get_representation(self):
 
     # We attribute randomly the shifts that are left.
     while placed != total_workers_shifts:
-        random_position = random.randint(0, total_indexes - 1)
+        random_position = rng.randint(0, total_indexes - 1)
         if representation[random_position] == 0:
             representation[random_position] = 1
             placed += 1
@@ -53,10 +44,45 @@ def get_representation(self):
     return representation
 
 
-Individual.get_representation = get_representation
+def get_coverage_representation(instance, rng=random):
+    """Creates a representation where each shift has exactly the number of workers it needs.
+
+    The shifts are filled in a random order, each one with the workers that have the fewest shifts so far (ties
+    broken at random), so the shifts are also spread evenly across the workers.
+
+    Args:
+        instance (ProblemInstance): The problem being solved.
+        rng (random.Random): Random generator, the random module by default.
+
+    Returns:
+        list: The representation.
+    """
+    total_shifts = instance.total_shifts
+    representation = [0] * instance.genome_length
+    assigned = [0] * instance.workers
+
+    for shift in rng.sample(range(total_shifts), total_shifts):
+        # Shuffling the workers before the stable sort, so the workers with as many shifts are drawn at random.
+        order = sorted(rng.sample(range(instance.workers), instance.workers), key=assigned.__getitem__)
+        for worker in order[:instance.workers_per_shift[shift]]:
+            representation[worker * total_shifts + shift] = 1
+            assigned[worker] += 1
+
+    return representation
+
+
+# The encodings of the schedules. With the coverage encoding the initial population meets the number of workers
+# of every shift, and the column operators (column_uniform_crossover, column_single_point_co and
+# column_swap_mutation) keep it that way.
+encodings = {"binary": get_representation, "coverage": get_coverage_representation}
 
 
-def get_fitness(self):
+def get_fitness(representation, instance):
+    """Loop implementation of the fitness, kept as the reference for the vectorized versions."""
+    days, shifts, workers = instance.days, instance.shifts, instance.workers
+    workers_per_shift, holidays, preferences = instance.workers_per_shift, instance.holidays, instance.preferences
+    skilled_shifts, skills = instance.skilled_shifts, instance.skills
+
     # Initiating the placeholders for the variable we are going to work with on the function.
     fitness = 0
     total_shifts = shifts * days
@@ -71,7 +97,7 @@ def get_fitness(self):
 
     # Checking if the distribution of workers across the shifts is well-balanced.
     for i in range(workers):
-        calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+        calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
         working_days = sum(calendar)
         if (working_days >= (4 * (days / 7))) and (working_days <= (6 * (days / 7))):
             fitness += 1000  # We increase 1000 of fitness for each worker that has its shifts well-distributed.
@@ -80,14 +106,14 @@ def get_fitness(self):
     # Checking if any worker works two shifts in a row.
     for i in range(workers):
         for j in range(total_shifts - 1):
-            calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+            calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
             if calendar[j] == calendar[j + 1] == 1:
                 fitness -= 100  # Decrease 100 of fitness for each consecutive working shift.
                 consecutive_shifts += 1
 
     # Checking if any worker works more than 3 shifts in 2 consecutive days.
     for i in range(workers):
-        calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+        calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
         for j in range(days):
             two_day_span = calendar[(2 * j * shifts):(2 * (j + 1) * shifts)]
             if sum(two_day_span) > 3:
@@ -99,14 +125,14 @@ def get_fitness(self):
         number_of_workers = 0
         for worker in range(workers):
             index = shift + worker * total_shifts
-            number_of_workers += self.representation[index]
+            number_of_workers += representation[index]
         if number_of_workers != workers_per_shift[shift]:
             fitness -= 300  # For each number of workers on a shift that is not met, fitness decreases by 300.
             shifts_wrong_filled += 1
 
     # Checking if the holidays of each worker were met.
     for i in range(workers):
-        calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+        calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
         for j in range(total_shifts):
             if holidays[i][j] == 1 and calendar[j] == 1:
                 fitness -= 100  # If the worker is scheduled to work on a day of holidays fitness decreases by 100.
@@ -114,7 +140,7 @@ def get_fitness(self):
 
     # Checking if the current allocation has the skilled workers assigned to the skilled shifts.
     for i in range(workers):
-        calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+        calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
         for shift, required_skills in skilled_shifts.items():
             if calendar[shift] == 1:
                 missing_skill = False  # Introducing a boolean flag, as we don't want to subtract 5 multiple times.
@@ -128,7 +154,7 @@ def get_fitness(self):
 
     # Checking if the preferences of each worker were met.
     for i in range(workers):
-        calendar = self.representation[(i * total_shifts):((i + 1) * total_shifts)]
+        calendar = representation[(i * total_shifts):((i + 1) * total_shifts)]
         for j in range(total_shifts):
 
             if (preferences[i][j] == 1 and calendar[j] == 1) or (preferences[i][j] == -1 and calendar[j] == 0):
@@ -143,11 +169,194 @@ def get_fitness(self):
         holidays_not_met, skilled_shifts_failed, preferences_met, preferences_not_met
 
 
-Individual.get_fitness = get_fitness
+def fitness_components(genomes, instance):
+    """Vectorized version of get_fitness for one or more genomes.
+
+    Args:
+        genomes (array-like): Genomes stacked as rows, shaped (n, days * shifts * workers).
+        instance (ProblemInstance): The problem being solved.
+
+    Returns:
+        np.ndarray: Array shaped (n, 9) with the same components, in the same order, as get_fitness.
+    """
+    days = instance.days
+    # Viewing every genome as a workers x shifts calendar.
+    calendar = np.asarray(genomes, dtype=np.int64).reshape(-1, instance.workers, instance.total_shifts)
+    working = calendar == 1
+
+    # Checking if the distribution of workers across the shifts is well-balanced.
+    working_days = calendar.sum(axis=2)
+    distributed_workers = ((working_days >= (4 * (days / 7))) & (working_days <= (6 * (days / 7)))).sum(axis=1)
+
+    # Checking if any worker works two shifts in a row.
+    consecutive_shifts = (working[:, :, :-1] & working[:, :, 1:]).sum(axis=(1, 2))
+
+    # Checking if any worker works more than 3 shifts in 2 consecutive days.
+    two_day_sums = np.add.reduceat(calendar, instance.two_day_starts, axis=2)
+    shifts_2_days = (two_day_sums > 3).sum(axis=(1, 2))
+
+    # Checking if the number of workers per shift was met.
+    shifts_wrong_filled = (calendar.sum(axis=1) != instance.coverage).sum(axis=1)
+
+    # Checking if the holidays of each worker were met.
+    holidays_not_met = (working & (instance.holidays_matrix == 1)).sum(axis=(1, 2))
+
+    # Checking if the current allocation has the skilled workers assigned to the skilled shifts.
+    skilled_shifts_failed = (working & ~instance.skill_eligibility).sum(axis=(1, 2))
+
+    # Checking if the preferences of each worker were met.
+    resting = calendar == 0
+    preferences = instance.preferences_matrix
+    preferences_met = (((preferences == 1) & working) | ((preferences == -1) & resting)).sum(axis=(1, 2))
+    preferences_not_met = (((preferences == -1) & working) | ((preferences == 1) & resting)).sum(axis=(1, 2))
+
+    fitness = (1000 * distributed_workers - 100 * consecutive_shifts - 100 * shifts_2_days
+               - 300 * shifts_wrong_filled - 100 * holidays_not_met - 200 * skilled_shifts_failed
+               + 10 * preferences_met - 10 * preferences_not_met)
+
+    return np.stack([fitness, distributed_workers, consecutive_shifts, shifts_2_days, shifts_wrong_filled,
+                     holidays_not_met, skilled_shifts_failed, preferences_met, preferences_not_met], axis=1)
+
+
+def get_fitness_vectorized(representation, instance):
+    """Array-based drop-in replacement for get_fitness, returning the same tuple."""
+    return tuple(int(value) for value in fitness_components([list(representation)], instance)[0])
+
+
+def get_fitness_batch(genomes, instance):
+    """Scores a whole generation at once.
+
+    Args:
+        genomes (np.ndarray): Genomes stacked as rows, shaped (pop_size, genome_len).
+        instance (ProblemInstance): The problem being solved.
+
+    Returns:
+        list: One get_fitness tuple per genome.
+    """
+    return [tuple(row) for row in fitness_components(genomes, instance).tolist()]
+
+
+def get_fitness_delta(fitness, parent, offspring, positions, instance):
+    """Updates the fitness of a parent after some of its genes changed.
+
+    Only the worker rows, shift columns, 2-day spans and pairs of adjacent shifts touching the changed
+    positions are scored, once on the parent and once on the offspring, and the difference is applied.
+
+    Args:
+        fitness (tuple): Fitness of the parent, as returned by get_fitness.
+        parent (Individual): The parent before the changes.
+        offspring (list): Representation of the offspring.
+        positions (list): Indexes where the offspring may differ from the parent.
+        instance (ProblemInstance): The problem being solved.
+
+    Returns:
+        tuple: Fitness of the offspring, as returned by get_fitness.
+    """
+    days, shifts, workers = instance.days, instance.shifts, instance.workers
+    workers_per_shift, holidays, preferences = instance.workers_per_shift, instance.holidays, instance.preferences
+    total_shifts = shifts * days
+    components = list(fitness[1:])
+    positions = set(positions)
+
+    # Finding the parts of the schedule affected by the changes.
+    rows = set()
+    columns = set()
+    pairs = set()
+    spans = set()
+    for position in positions:
+        worker, shift = divmod(position, total_shifts)
+        rows.add(worker)
+        columns.add(shift)
+        pairs.update((worker, j) for j in (shift - 1, shift) if 0 <= j < total_shifts - 1)
+        spans.add((worker, shift // (2 * shifts)))
+
+    # Removing the contribution of the parent and adding the one of the offspring.
+    for genome, sign in ((parent, -1), (offspring, 1)):
+        for worker in rows:
+            working_days = sum(genome[(worker * total_shifts):((worker + 1) * total_shifts)])
+            if (working_days >= (4 * (days / 7))) and (working_days <= (6 * (days / 7))):
+                components[0] += sign
+
+        for worker, j in pairs:
+            if genome[worker * total_shifts + j] == genome[worker * total_shifts + j + 1] == 1:
+                components[1] += sign
+
+        for worker, j in spans:
+            start = worker * total_shifts + 2 * j * shifts
+            end = worker * total_shifts + min(2 * (j + 1) * shifts, total_shifts)
+            if sum(genome[start:end]) > 3:
+                components[2] += sign
+
+        for shift in columns:
+            number_of_workers = sum(genome[shift + worker * total_shifts] for worker in range(workers))
+            if number_of_workers != workers_per_shift[shift]:
+                components[3] += sign
+
+        for position in positions:
+            worker, shift = divmod(position, total_shifts)
+            value = genome[position]
+            if holidays[worker][shift] == 1 and value == 1:
+                components[4] += sign
+            if not instance.skill_eligibility[worker, shift] and value == 1:
+                components[5] += sign
+            if (preferences[worker][shift] == 1 and value == 1) or (preferences[worker][shift] == -1 and value == 0):
+                components[6] += sign
+            elif (preferences[worker][shift] == -1 and value == 1) or (preferences[worker][shift] == 1 and value == 0):
+                components[7] += sign
+
+    distributed_workers, consecutive_shifts, shifts_2_days, shifts_wrong_filled, holidays_not_met, \
+        skilled_shifts_failed, preferences_met, preferences_not_met = components
+    fitness = (1000 * distributed_workers - 100 * consecutive_shifts - 100 * shifts_2_days
+               - 300 * shifts_wrong_filled - 100 * holidays_not_met - 200 * skilled_shifts_failed
+               + 10 * preferences_met - 10 * preferences_not_met)
+
+    return (fitness, distributed_workers, consecutive_shifts, shifts_2_days, shifts_wrong_filled, holidays_not_met,
+            skilled_shifts_failed, preferences_met, preferences_not_met)
+
+
+def use_instance(instance, encoding="binary"):
+    """Monkey patches the Individual class to solve the given instance.
+
+    Args:
+        instance (ProblemInstance): The problem to solve.
+        encoding (str): "binary" or "coverage", see encodings.
+    """
+    if encoding not in encodings:
+        raise Exception(f"Unknown encoding {encoding}, choose one of {list(encodings)}.")
+    representation_function = encodings[encoding]
+
+    def representation_method(rng=random):
+        return representation_function(instance, rng)
+
+    def fitness_method(self):
+        return get_fitness_vectorized(self.representation, instance)
+
+    def fitness_batch(genomes):
+        return get_fitness_batch(genomes, instance)
+
+    def fitness_delta(fitness, parent, offspring, positions):
+        return get_fitness_delta(fitness, parent, offspring, positions, instance)
+
+    def neighbours_method(self, func, n=1, rng=random):
+        # Drawing n moves of the neighbourhood and scoring each neighbour from the fitness of this individual.
+        neighbours = []
+        for _ in range(n):
+            move = func(self.representation, instance, rng)
+            if move is None:
+                continue
+            representation = self.representation[:]
+            for position, value in move.items():
+                representation[position] = value
+            neighbours.append(Individual(representation=representation,
+                                         fitness=get_fitness_delta(self.fitness, self, representation, list(move),
+                                                                   instance)))
+        return neighbours
 
-pop = Population(
-    size=100,
-    optim="max")
+    Individual.get_representation = staticmethod(representation_method)
+    Individual.get_fitness = fitness_method
+    Individual.get_fitness_batch = staticmethod(fitness_batch)
+    Individual.get_fitness_delta = staticmethod(fitness_delta)
+    Individual.get_neighbours = neighbours_method
+    # The genome is the calendar of each worker, one after the other: a workers x shifts matrix.
+    Individual.layout = (instance.workers, instance.total_shifts)
 
-pop.evolve(gens=200, select=rank, mutate=swap_mutation, crossover=uniform_crossover,
-           mut_prob=1.00, xo_prob=1.00, elitism=True)
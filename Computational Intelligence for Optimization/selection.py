@@ -1,16 +1,57 @@
-from random import uniform, choice, sample, choices
+import random
 from operator import attrgetter
+from itertools import accumulate
+from bisect import bisect_right
 
 
-def fps(population):
-    """Fitness proportionate selection implementation.
+def selection_wheel(population, builder):
+    """Gets the wheel of a selection method for the current individuals of the population.
+
+    The wheel is built once per generation and kept in the population's selection cache, which is only valid
+    for the list of individuals it was built from.
 
     Args:
         population (Population): The population we want to select from.
+        builder (function): Function building the wheel, such as fps_wheel or rank_wheel.
+
+    Returns:
+        tuple: The individuals, their cumulative weights and the total weight.
+    """
+    cache = population.selection_cache
+    if cache is None or cache[0] is not population.individuals:
+        cache = (population.individuals, {})
+        population.selection_cache = cache
+    if builder not in cache[1]:
+        cache[1][builder] = builder(population)
+    return cache[1][builder]
+
+
+def spin_wheel(wheel, rng=random):
+    """Draws an individual from a wheel with a binary search.
+
+    Args:
+        wheel (tuple): The individuals, their cumulative weights and the total weight.
+        rng (random.Random): Random generator, the random module by default.
 
     Returns:
         Individual: selected individual.
     """
+    individuals, cumulative, total = wheel
+    # Get a 'position' on the wheel.
+    spin = rng.uniform(0, total)
+    # Find individual in the position of the spin, the first one whose cumulative weight passes it.
+    return individuals[min(bisect_right(cumulative, spin), len(individuals) - 1)]
+
+
+def fps_wheel(population):
+    """Builds the fitness proportionate selection wheel.
+
+    Args:
+        population (Population): The population we want to select from.
+
+    Returns:
+        tuple: The individuals, their cumulative weights and the total weight.
+    """
     # Finding the worse fitness out of the population.
     lowest_fitness = 100
     for i in population:
@@ -25,38 +66,35 @@ def fps(population):
         absolute_fitness = -lowest_fitness
 
     if population.optim == "max":
-
-        # Sum total fitness.
-        total_fitness = sum([(i.fitness[0] + absolute_fitness) for i in population])
-        # Get a 'position' on the wheel.
-        spin = uniform(0, total_fitness)
-        position = 0
-        # Find individual in the position of the spin.
-        for individual in population:
-            position += (individual.fitness[0] + absolute_fitness)
-            if position > spin:
-                return individual
+        weights = [(i.fitness[0] + absolute_fitness) for i in population]
 
     elif population.optim == "min":
 
         # Finding the maximum of each fitness plus the absolute fitness.
         max_joint_fitness = max([(i.fitness[0] + absolute_fitness) for i in population])
 
-        # Obtaining the total fitness taking into consideration that this is a minimization problem.
-        total_fitness = sum([(max_joint_fitness - (i.fitness[0] + absolute_fitness))/(max_joint_fitness + 0.0001) for i
-                             in population])
-        # Get a "position" on the wheel.
-        spin = uniform(0, total_fitness)
-        position = 0
-        # Find individual in the position of the spin.
-        for individual in population:
-            position += ((max_joint_fitness - (individual.fitness[0] + absolute_fitness)) / (max_joint_fitness + 0.0001))
-            if position > spin:
-                return individual
+        # The weights take into consideration that this is a minimization problem.
+        weights = [(max_joint_fitness - (i.fitness[0] + absolute_fitness)) / (max_joint_fitness + 0.0001) for i
+                   in population]
 
     else:
         raise Exception("No optimization specified (min or max).")
 
+    # Sum total fitness.
+    return population.individuals, list(accumulate(weights)), sum(weights)
+
+
+def fps(population):
+    """Fitness proportionate selection implementation.
+
+    Args:
+        population (Population): The population we want to select from.
+
+    Returns:
+        Individual: selected individual.
+    """
+    return spin_wheel(selection_wheel(population, fps_wheel), population.rng)
+
 
 def tournament_sel(population, size=4):
     """Tournament selection implementation.
@@ -72,7 +110,7 @@ def tournament_sel(population, size=4):
     # Select individuals based on tournament size
     # with choice, there is a possibility of repetition in the choices,
     # so every individual has a chance of getting selected
-    tournament = [choice(population.individuals) for _ in range(size)]
+    tournament = [population.rng.choice(population.individuals) for _ in range(size)]
 
     # with sample, there is no repetition of choices
     # tournament = sample(population.individuals, size)
@@ -82,20 +120,57 @@ def tournament_sel(population, size=4):
         return min(tournament, key=attrgetter("fitness"))
 
 
-def rank(population):
-    # Ranking individuals based on optimality approach.
+def rank_wheel(population):
+    """Builds the rank selection wheel.
+
+    Args:
+        population (Population): The population we want to select from.
+
+    Returns:
+        tuple: The ranked individuals, their cumulative ranks and the sum of all rankings.
+    """
+    # Ranking individuals based on optimality approach. The population itself is left in its order.
     if population.optim == 'max':
-        population.individuals.sort(key=attrgetter('fitness'))
+        ranked = sorted(population.individuals, key=attrgetter('fitness'))
     elif population.optim == 'min':
-        population.individuals.sort(key=attrgetter('fitness'), reverse=True)
+        ranked = sorted(population.individuals, key=attrgetter('fitness'), reverse=True)
 
     # Summing all rankings.
     total = sum(range(population.size+1))
-    # Getting random positions.
-    spin = uniform(0, total)
-    position = 0
-    # Iterating until spin is found.
-    for count, individual in enumerate(population):
-        position += count + 1
-        if position > spin:
-            return individual
+    return ranked, list(accumulate(range(1, len(ranked) + 1))), total
+
+
+def rank(population):
+    """Rank selection implementation.
+
+    Args:
+        population (Population): The population we want to select from.
+
+    Returns:
+        Individual: selected individual.
+    """
+    return spin_wheel(selection_wheel(population, rank_wheel), population.rng)
+
+
+def select_many(population, select, n):
+    """Selects all the parents needed for a generation in one call.
+
+    Args:
+        population (Population): The population we want to select from.
+        select (function): The selection method.
+        n (int): Number of parents to select.
+
+    Returns:
+        list: The selected individuals.
+    """
+    if select in wheel_builders:
+        wheel = selection_wheel(population, wheel_builders[select])
+        return [spin_wheel(wheel, population.rng) for _ in range(n)]
+    return [select(population) for _ in range(n)]
+
+
+# The selection methods by name, used to choose them from the grid-search and run configurations.
+selection_methods = {"fps": fps, "tournament_sel": tournament_sel, "rank": rank}
+
+# The selection methods that draw from a wheel, and the functions building their wheels.
+wheel_builders = {fps: fps_wheel, rank: rank_wheel}
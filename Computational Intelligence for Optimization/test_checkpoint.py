@@ -0,0 +1,24 @@
+import pytest
+from run_scheduling import main
+
+# A run killed and resumed from its checkpoint must follow the uninterrupted run, including its stopping criteria.
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_resumed_run_matches_uninterrupted_run(seed, tmp_path):
+    settings = ["--instance", "easy", "--size", "30", "--gens", "100", "--stagnation", "4", "--seed", str(seed),
+                "--report", "silent"]
+    uninterrupted = main(settings)
+    assert uninterrupted.stop_reason == "stagnation"
+
+    # Stopping one generation before the stagnation, when the counter of the criterion is already running.
+    checkpoint = tmp_path / "run.npz"
+    interrupted_gens = str(uninterrupted.stop_gen - 1)
+    main(settings + ["--gens", interrupted_gens, "--checkpoint", str(checkpoint),
+                     "--checkpoint-interval", interrupted_gens])
+    resumed = main(settings + ["--checkpoint", str(checkpoint)])
+
+    assert resumed.stop_reason == "stagnation"
+    assert resumed.stop_gen == uninterrupted.stop_gen
+    assert resumed.fitnesses == uninterrupted.fitnesses
+    assert [individual.fitness for individual in resumed] == [individual.fitness for individual in uninterrupted]
@@ -0,0 +1,37 @@
+import random
+import pytest
+from problem_instance import load_instance
+from scheduling_problem import get_representation, get_coverage_representation, get_fitness, \
+    get_fitness_vectorized, get_fitness_batch, get_fitness_delta
+from mutation import binary_mutation, swap_mutation, inversion_mutation
+
+# The loop implementation of get_fitness is the reference, the faster versions must give the same tuples.
+
+
+@pytest.mark.parametrize("name", ["easy", "medium_hard"])
+def test_vectorized_fitness_matches_loop(name):
+    instance = load_instance(name)
+    rng = random.Random(0)
+    genomes = [get_representation(instance, rng) for _ in range(20)] + \
+        [get_coverage_representation(instance, rng) for _ in range(20)]
+
+    expected = [get_fitness(genome, instance) for genome in genomes]
+    assert [get_fitness_vectorized(genome, instance) for genome in genomes] == expected
+    assert [tuple(fitness) for fitness in get_fitness_batch(genomes, instance)] == expected
+
+
+@pytest.mark.parametrize("name", ["easy", "medium_hard"])
+@pytest.mark.parametrize("mutate", [binary_mutation, swap_mutation, inversion_mutation])
+def test_delta_fitness_matches_loop(name, mutate):
+    instance = load_instance(name)
+    rng = random.Random(0)
+    for _ in range(20):
+        parent = get_representation(instance, rng)
+        offspring = parent.copy()
+        positions = []
+        # Several mutations in a row, as the changes of one offspring can overlap.
+        for _ in range(rng.randint(1, 3)):
+            mutate(offspring, positions=positions, rng=rng)
+
+        assert get_fitness_delta(get_fitness(parent, instance), parent, offspring, positions, instance) == \
+            get_fitness(offspring, instance)
@@ -0,0 +1,39 @@
+import numpy as np
+from charles import Population
+from problem_instance import load_instance
+from scheduling_problem import use_instance
+from selection import selection_methods
+from mutation import mutation_methods
+from crossover import crossover_methods
+from results import load_runs
+
+# The runs stored in a results file must survive the other writers of the same file.
+
+settings = dict(select=selection_methods["rank"], mutate=mutation_methods["swap_mutation"],
+                crossover=crossover_methods["uniform_crossover"], mut_prob=1.0, xo_prob=1.0, elitism=True,
+                report="silent", store=True)
+
+
+def test_run_over_several_calls_is_one_record(tmp_path):
+    use_instance(load_instance("easy"))
+    pop = Population(size=20, optim="max", filename="runs", folder=f"{tmp_path}/", seed=0)
+    pop.evolve(gens=5, **settings)
+    pop.evolve(gens=5, **settings)
+
+    runs = load_runs(tmp_path / "runs.bin")
+    assert runs.shape == (10, 1)
+
+
+def test_populations_sharing_a_file_keep_their_runs(tmp_path):
+    use_instance(load_instance("easy"))
+    first = Population(size=20, optim="max", filename="runs", folder=f"{tmp_path}/", seed=0)
+    second = Population(size=20, optim="max", filename="runs", folder=f"{tmp_path}/", seed=1)
+    first.evolve(gens=5, **settings)
+    second.evolve(gens=5, **settings)
+    # The record of the first population isn't the last one anymore, so its run goes on in a new record.
+    first.evolve(gens=5, **settings)
+
+    runs = load_runs(tmp_path / "runs.bin")
+    assert runs.shape == (10, 3)
+    assert np.array_equal(runs[:5, 1], second.writer.buffer)
+    assert np.array_equal(runs[:, 2], first.writer.buffer)